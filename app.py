@@ -9,7 +9,9 @@ Python: 3.9+
 
 import streamlit as st
 from legal_chatbot.chatbot.chatbot import LegalChatbot
-from config import Config, logger
+from legal_chatbot.agents.classifier import warm_up_agents
+from legal_chatbot.config import Config, logger
+import asyncio
 import os
 import tempfile
 from pathlib import Path
@@ -24,9 +26,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Open the Gemini connection while the page renders (once per process)
+warm_up_agents()
+
 # ==================== Minimal Blue & White Styling ====================
 
-st.markdown("""
+@st.cache_resource
+def load_css():
+    """Build the stylesheet once per process instead of on every rerun"""
+    return """
     <style>
     /* Blue & White color scheme */
     :root {
@@ -112,7 +120,9 @@ st.markdown("""
     
     [data-testid="stMetricValue"] { color: var(--primary-blue); }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # ==================== Session State ====================
 
@@ -164,104 +174,156 @@ def process_document(file):
 
 # ==================== Query Processing ====================
 
+def query_metadata():
+    """Routing metadata of the last processed query"""
+    return {
+        'query_type': st.session_state.chatbot.state.get('query_type'),
+        'routing': st.session_state.chatbot.state.get('routing_decision')
+    }
+
 def process_query(query):
     """Process user query"""
     try:
         response = st.session_state.chatbot.process_query(query)
         st.session_state.query_count += 1
         
-        # Get metadata
-        metadata = {
-            'query_type': st.session_state.chatbot.state.get('query_type'),
-            'routing': st.session_state.chatbot.state.get('routing_decision')
-        }
-        
-        return True, response, metadata
+        return True, response, query_metadata()
         
     except Exception as e:
         logger.error(f"Query processing error: {e}")
         return False, str(e), None
 
+def process_full_report():
+    """Generate all quick analyses in one batched call"""
+    try:
+        report = st.session_state.chatbot.generate_full_report()
+        st.session_state.query_count += 1
+        return True, report
+        
+    except Exception as e:
+        logger.error(f"Full report error: {e}")
+        return False, str(e)
+
+def process_all_quick(queries):
+    """Run several quick analyses concurrently"""
+    try:
+        records = asyncio.run(st.session_state.chatbot.quick_analyze_all(queries))
+        st.session_state.query_count += len(queries)
+        return True, records
+        
+    except Exception as e:
+        logger.error(f"Quick analysis error: {e}")
+        return False, str(e)
+
 # ==================== Sidebar ====================
 
+@st.fragment
 def render_sidebar():
-    """Render sidebar with document management"""
-    with st.sidebar:
-        st.title("⚖️ SueBot")
-        st.caption("Legal Document Review Assistant")
-        
-        st.divider()
-        
-        # Document upload
-        st.subheader("Document Upload")
-        uploaded = st.file_uploader(
-            "Upload legal document",
-            type=['pdf', 'png', 'jpg', 'jpeg', 'tiff', 'bmp'],
-            help="PDF, PNG, JPG, TIFF, BMP supported"
-        )
-        
-        if uploaded:
-            if st.button("📤 Process Document", use_container_width=True, type="primary"):
-                with st.spinner("Processing..."):
-                    success, msg = process_document(uploaded)
-                    if success:
-                        st.success("Document loaded!")
-                        st.rerun()
-                    else:
-                        st.error(f"Error: {msg}")
+    """Render sidebar with document management (reruns independently of the chat)"""
+    st.title("⚖️ SueBot")
+    st.caption("Legal Document Review Assistant")
+    
+    st.divider()
+    
+    # Document upload
+    st.subheader("Document Upload")
+    uploaded = st.file_uploader(
+        "Upload legal document",
+        type=['pdf', 'png', 'jpg', 'jpeg', 'tiff', 'bmp'],
+        help="PDF, PNG, JPG, TIFF, BMP supported"
+    )
+    
+    if uploaded:
+        if st.button("📤 Process Document", use_container_width=True, type="primary"):
+            with st.spinner("Processing..."):
+                success, msg = process_document(uploaded)
+                if success:
+                    st.success("Document loaded!")
+                    st.rerun()
+                else:
+                    st.error(f"Error: {msg}")
+    
+    st.divider()
+    
+    # Document info
+    if st.session_state.doc_loaded and st.session_state.doc_info:
+        st.subheader("Current Document")
+        info = st.session_state.doc_info
         
-        st.divider()
+        st.text(f"📄 {info['filename']}")
+        st.text(f"📊 {info['size_mb']} MB")
+        st.text(f"📝 {info['word_count']:,} words")
         
-        # Document info
-        if st.session_state.doc_loaded and st.session_state.doc_info:
-            st.subheader("Current Document")
-            info = st.session_state.doc_info
-            
-            st.text(f"📄 {info['filename']}")
-            st.text(f"📊 {info['size_mb']} MB")
-            st.text(f"📝 {info['word_count']:,} words")
-            
-            if st.button("🗑️ Clear Document", use_container_width=True):
+        if st.button("🗑️ Clear Document", use_container_width=True):
+            st.session_state.chatbot.clear_document()
+            st.session_state.doc_loaded = False
+            st.session_state.doc_info = None
+            st.rerun()
+    else:
+        st.info("No document loaded")
+    
+    st.divider()
+
+def render_session_stats():
+    """Render query count, duration and token usage"""
+    st.subheader("Session Stats")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Queries", st.session_state.query_count)
+    with col2:
+        duration = datetime.now() - st.session_state.start_time
+        st.metric("Duration", f"{int(duration.total_seconds()/60)}m")
+    
+    # Token usage recorded by the chatbot's telemetry callback
+    usage = st.session_state.chatbot.usage
+    totals = usage.totals()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Tokens In", f"{totals.input_tokens:,}")
+    with col2:
+        st.metric("Tokens Out", f"{totals.output_tokens:,}")
+    
+    by_node = usage.snapshot()
+    if by_node:
+        with st.expander("Usage by agent"):
+            st.dataframe([
+                {
+                    "Agent": node,
+                    "Calls": stats.calls,
+                    "In": stats.input_tokens,
+                    "Out": stats.output_tokens,
+                    "Cached": stats.cached_tokens,
+                    "Latency (s)": round(stats.avg_latency_s, 2),
+                    "TTFT (s)": round(stats.avg_ttft_s, 2) if stats.ttft_samples else None
+                }
+                for node, stats in by_node.items()
+            ], hide_index=True)
+    
+    st.divider()
+
+def render_sidebar_actions():
+    """Render chat and session reset actions"""
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 Clear Chat", use_container_width=True):
+            st.session_state.messages = []
+            st.session_state.query_count = 0
+            st.session_state.chatbot.usage.reset()
+            st.rerun()
+    with col2:
+        if st.button("🔁 Reset All", use_container_width=True):
+            st.session_state.messages = []
+            st.session_state.query_count = 0
+            st.session_state.chatbot.usage.reset()
+            if st.session_state.doc_loaded:
                 st.session_state.chatbot.clear_document()
                 st.session_state.doc_loaded = False
                 st.session_state.doc_info = None
-                st.rerun()
-        else:
-            st.info("No document loaded")
-        
-        st.divider()
-        
-        # Statistics
-        st.subheader("Session Stats")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Queries", st.session_state.query_count)
-        with col2:
-            duration = datetime.now() - st.session_state.start_time
-            st.metric("Duration", f"{int(duration.total_seconds()/60)}m")
-        
-        st.divider()
-        
-        # Actions
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("🔄 Clear Chat", use_container_width=True):
-                st.session_state.messages = []
-                st.session_state.query_count = 0
-                st.rerun()
-        with col2:
-            if st.button("🔁 Reset All", use_container_width=True):
-                st.session_state.messages = []
-                st.session_state.query_count = 0
-                if st.session_state.doc_loaded:
-                    st.session_state.chatbot.clear_document()
-                    st.session_state.doc_loaded = False
-                    st.session_state.doc_info = None
-                st.rerun()
-        
-        st.divider()
-        st.caption("v2.0.0 | Legal Tech Team")
+            st.rerun()
+    
+    st.divider()
+    st.caption("v2.0.0 | Legal Tech Team")
 
 # ==================== Main App ====================
 
@@ -272,14 +334,25 @@ def main():
     init_session()
     
     # Render sidebar
-    render_sidebar()
+    with st.sidebar:
+        render_sidebar()
+        # Filled by the chat fragment, so stats update after every query
+        stats = st.container().empty()
+        render_sidebar_actions()
     
     # Header
     st.title("Legal Consultation Chat")
     
-    # Welcome message
+    render_chat(stats)
+
+@st.fragment
+def render_chat(stats):
+    """Render quick actions, chat history and input (reruns independently of the sidebar)"""
+    
+    # Welcome message, held in a placeholder so the first prompt can clear it
+    welcome = st.empty()
     if not st.session_state.messages:
-        st.info("""
+        welcome.info("""
         👋 **Welcome to SueBot!**
         
         Upload a legal document and ask questions about:
@@ -292,7 +365,7 @@ def main():
     # Quick action buttons (if document loaded)
     if st.session_state.doc_loaded:
         st.subheader("Quick Actions")
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4, col5, col6 = st.columns(6)
         
         quick_queries = [
             ("📋 Summarize", "Provide a comprehensive summary of this document"),
@@ -301,6 +374,9 @@ def main():
             ("⚠️ Risk Assessment", "Conduct a risk assessment")
         ]
         
+        # FullReport field answering each quick query
+        report_fields = ["summary", "fdcpa_findings", "tcpa_findings", "risk_assessment"]
+        
         for col, (label, query) in zip([col1, col2, col3, col4], quick_queries):
             with col:
                 if st.button(label, use_container_width=True):
@@ -327,7 +403,59 @@ def main():
                                 "content": f"Error: {response}",
                                 "timestamp": datetime.now()
                             })
-                    st.rerun()
+                    st.rerun(scope="fragment")
+        
+        with col5:
+            if st.button("📑 Full Report", use_container_width=True):
+                with st.spinner("Generating full report..."):
+                    success, report = process_full_report()
+                    if success:
+                        for (_, query), field in zip(quick_queries, report_fields):
+                            st.session_state.messages.append({
+                                "role": "user",
+                                "content": query,
+                                "timestamp": datetime.now()
+                            })
+                            st.session_state.messages.append({
+                                "role": "assistant",
+                                "content": getattr(report, field),
+                                "timestamp": datetime.now()
+                            })
+                    else:
+                        st.session_state.messages.append({
+                            "role": "error",
+                            "content": f"Error: {report}",
+                            "timestamp": datetime.now()
+                        })
+                st.rerun(scope="fragment")
+        
+        with col6:
+            if st.button("🚀 Run All", use_container_width=True):
+                with st.spinner("Running all analyses..."):
+                    success, records = process_all_quick([query for _, query in quick_queries])
+                    if success:
+                        for (_, query), record in zip(quick_queries, records):
+                            st.session_state.messages.append({
+                                "role": "user",
+                                "content": query,
+                                "timestamp": datetime.now()
+                            })
+                            st.session_state.messages.append({
+                                "role": "assistant",
+                                "content": record["content"],
+                                "timestamp": datetime.now(),
+                                "metadata": {
+                                    'query_type': record["query_type"],
+                                    'routing': record["routing_decision"]
+                                }
+                            })
+                    else:
+                        st.session_state.messages.append({
+                            "role": "error",
+                            "content": f"Error: {records}",
+                            "timestamp": datetime.now()
+                        })
+                st.rerun(scope="fragment")
         
         st.divider()
     
@@ -357,6 +485,8 @@ def main():
     
     # Chat input
     if prompt := st.chat_input("Ask about the legal document..."):
+        welcome.empty()
+        
         # Add user message
         st.session_state.messages.append({
             "role": "user",
@@ -368,28 +498,31 @@ def main():
         with st.chat_message("user"):
             st.write(prompt)
         
-        # Process and display response
+        # Stream response tokens as they arrive
         with st.chat_message("assistant", avatar="⚖️"):
-            with st.spinner("Analyzing..."):
-                success, response, metadata = process_query(prompt)
-                
-                if success:
-                    st.write(response)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": response,
-                        "timestamp": datetime.now(),
-                        "metadata": metadata
-                    })
-                else:
-                    st.error(f"Error: {response}")
-                    st.session_state.messages.append({
-                        "role": "error",
-                        "content": f"Error: {response}",
-                        "timestamp": datetime.now()
-                    })
-        
-        st.rerun()
+            try:
+                response = st.write_stream(
+                    st.session_state.chatbot.process_query_stream(prompt)
+                )
+                st.session_state.query_count += 1
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": response,
+                    "timestamp": datetime.now(),
+                    "metadata": query_metadata()
+                })
+            except Exception as e:
+                logger.error(f"Query processing error: {e}")
+                st.error(f"Error: {e}")
+                st.session_state.messages.append({
+                    "role": "error",
+                    "content": f"Error: {e}",
+                    "timestamp": datetime.now()
+                })
+    
+    # Redraw the sidebar stats, which the sidebar fragment does not rerun for
+    with stats.container():
+        render_session_stats()
 
 # ==================== Entry Point ====================
 
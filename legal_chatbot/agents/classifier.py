@@ -1,22 +1,216 @@
-from legal_chatbot.models.query_models import QueryClassifier, LegalChatState, QueryType
-from legal_chatbot.config import Config
+from legal_chatbot.models.query_models import (
+    QueryClassifier, LegalChatState, LoadedDocument, QueryType, FullReport, DOCUMENT_MESSAGE_ID
+)
+from legal_chatbot.config import Config, logger
+from legal_chatbot.cache.semantic_cache import SemanticCache, document_namespace
+from legal_chatbot.agents.fast_classifier import FastClassifier, query_references
+from legal_chatbot.document_processing.retrieval import retrieve_chunks
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from typing import Optional
+from functools import lru_cache
+from weakref import WeakValueDictionary
+import threading
+import uuid
+
+@lru_cache(maxsize=None)
+def get_llm(model: str) -> ChatGoogleGenerativeAI:
+    """
+    Get the process-wide Gemini client for a model.
+    Every caller shares its gRPC channel, which multiplexes concurrent
+    requests over one HTTP/2 connection instead of opening one per client.
+    
+    Args:
+        model: Gemini model name
+        
+    Returns:
+        Shared ChatGoogleGenerativeAI instance
+    """
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=Config.LLM_TEMPERATURE,
+        transport="grpc"
+    )
+
 
 class LegalAgentNodes:
     """Collection of agent nodes for the legal chatbot workflow."""
     
     def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model=Config.LLM_MODEL,
-            temperature=Config.LLM_TEMPERATURE
+        # Classification is a short structured answer; analysis needs the stronger model
+        self.llm_fast = get_llm(Config.LLM_MODEL_FAST)
+        self.llm_deep = get_llm(Config.LLM_MODEL_DEEP)
+        # Paraphrases may hit, but only when their clause numbers and statutes match
+        self.cache = SemanticCache(references=query_references)
+        self.fast_classifier = FastClassifier()
+        # Loaded documents by id; each lives as long as the chatbot that loaded it
+        self.documents: "WeakValueDictionary[str, LoadedDocument]" = WeakValueDictionary()
+    
+    def register_document(self, document: LoadedDocument) -> str:
+        """
+        Make a loaded document available to the agents.
+        
+        Args:
+            document: Loaded document, kept alive by the caller
+            
+        Returns:
+            Document id to put in the chat state
+        """
+        document_id = uuid.uuid4().hex
+        self.documents[document_id] = document
+        return document_id
+    
+    def _document(self, state: LegalChatState) -> Optional[LoadedDocument]:
+        """Look up the document referenced by the chat state."""
+        document_id = state.get("document_id")
+        return self.documents.get(document_id) if document_id else None
+    
+    def warm_up(self) -> None:
+        """
+        Open the Gemini connection and load local models before the first query.
+        Uses a token-count request, which authenticates and sets up the channel
+        without generating (or billing) any output.
+        """
+        try:
+            self.llm_fast.get_num_tokens("ping")
+            self.llm_deep.get_num_tokens("ping")
+            self.fast_classifier.warm_up()
+            logger.info("Agent warm-up complete")
+        except Exception as e:
+            logger.warning(f"Agent warm-up failed: {e}")
+    
+    def _cached_invoke(self, node: str, state: LegalChatState, key_text: str, messages: list, llm=None, **invoke_kwargs):
+        """
+        Invoke the LLM, short-circuiting through the semantic cache.
+        
+        Args:
+            node: Name of the calling agent node (cache namespace)
+            state: Current chat state (document scopes the namespace)
+            key_text: Text identifying the request, typically the user query
+            messages: Messages to send on a cache miss
+            llm: Runnable to invoke (defaults to self.llm_deep)
+            **invoke_kwargs: Extra arguments for the LLM call
+            
+        Returns:
+            LLM response (cached messages are returned as fresh copies)
+        """
+        llm = llm or self.llm_deep
+        document = self._document(state)
+        namespace = document_namespace(node, document.digest if document else None)
+        response = self.cache.get_or_compute(
+            namespace, key_text, lambda: llm.invoke(messages, **invoke_kwargs)
         )
+        
+        # Without an id, add_messages appends a new message instead of replacing the cached one
+        if isinstance(response, BaseMessage):
+            return response.model_copy(update={"id": None})
+        return response
+    
+    def _system_message(self, state: LegalChatState):
+        """
+        Get the system message every specialist request starts with: the pinned
+        document message when a document is loaded, else the legal context.
+        It is identical across agents and turns, so Gemini's implicit prefix
+        cache reuses the document tokens instead of billing them on every call.
+        
+        Args:
+            state: Current chat state
+            
+        Returns:
+            System message
+        """
+        for message in state.get("messages", []):
+            if message.id == DOCUMENT_MESSAGE_ID:
+                return message
+        return SystemMessage(content=Config.LEGAL_CONTEXT)
+    
+    def _relevant_excerpts(self, state: LegalChatState, query: str, limit: int) -> str:
+        """
+        Pick the chunks past the pinned document head most relevant to the query (BM25).
+        
+        Args:
+            state: Current chat state with a loaded document
+            query: User query text
+            limit: Maximum number of document characters to include
+            
+        Returns:
+            Excerpt block for the user message
+        """
+        document = self._document(state)
+        chunks = retrieve_chunks(document.bm25, document.chunks, query, limit)
+        return "RELEVANT LATER EXCERPTS:\n" + "\n---\n".join(chunks)
+    
+    def _ask(
+        self,
+        node: str,
+        state: LegalChatState,
+        key_text: str,
+        role: str,
+        user_content: str,
+        limit: int = 0,
+        retrieval: bool = True
+    ):
+        """
+        Send a specialist request as [pinned system message, per-turn user message].
+        The per-turn message carries only the role, task, query and any excerpts.
+        Uses the document's Gemini context cache instead of the pinned message when available.
+        
+        Args:
+            node: Name of the calling agent node
+            state: Current chat state
+            key_text: Text identifying the request for the semantic cache
+            role: Specialist role description
+            user_content: Query and task specification
+            limit: Maximum number of characters of excerpts beyond the pinned head
+            retrieval: Add query-relevant excerpts from past the pinned head
+            
+        Returns:
+            LLM response message
+        """
+        user_content = f"Role: {role}\n\n{user_content}"
+        
+        handle = state.get("cache_handle")
+        if handle:
+            # Cached content already holds the legal context and the whole document,
+            # and requests referencing it may not set their own system instruction
+            messages = [{"role": "user", "content": user_content}]
+            return self._cached_invoke(node, state, key_text, messages, cached_content=handle)
+        
+        document = self._document(state)
+        if retrieval and limit and document and document.chunks:
+            user_content = f"{self._relevant_excerpts(state, key_text, limit)}\n\n{user_content}"
+        
+        return self._cached_invoke(node, state, key_text, [
+            self._system_message(state),
+            {"role": "user", "content": user_content}
+        ])
     
     def classify_query(self, state: LegalChatState) -> dict:
-        """Classify the type of legal query."""
+        """Classify the type of legal query, locally when unambiguous."""
         last_message = state["messages"][-1]
         
-        classifier_llm = self.llm.with_structured_output(QueryClassifier)
+        result = self.fast_classifier.classify(last_message.content)
+        # Without a document, any type but general inquiry routes to document_request;
+        # leave that call to the LLM, which knows no document is loaded
+        if result is not None and result.query_type != QueryType.GENERAL_INQUIRY and self._document(state) is None:
+            result = None
+        if result is None:
+            result = self._classify_with_llm(state)
+        
+        return {
+            "query_type": result.query_type,
+            "analysis_results": {
+                "confidence": result.confidence,
+                "key_terms": result.key_terms
+            }
+        }
+    
+    def _classify_with_llm(self, state: LegalChatState) -> QueryClassifier:
+        """Classify the query with a structured-output LLM call."""
+        last_message = state["messages"][-1]
+        
+        classifier_llm = self.llm_fast.with_structured_output(QueryClassifier)
         
         classification_prompt = f"""
         {Config.LEGAL_CONTEXT}
@@ -30,26 +224,18 @@ class LegalAgentNodes:
         
         Query: {last_message.content}
         
-        Document available: {state.get('document_content') is not None}
+        Document available: {self._document(state) is not None}
         """
         
-        result = classifier_llm.invoke([
+        return self._cached_invoke("classifier", state, last_message.content, [
             {"role": "system", "content": "You are a legal query classifier."},
             {"role": "user", "content": classification_prompt}
-        ])
-        
-        return {
-            "query_type": result.query_type,
-            "analysis_results": {
-                "confidence": result.confidence,
-                "key_terms": result.key_terms
-            }
-        }
+        ], llm=classifier_llm)
     
     def route_query(self, state: LegalChatState) -> dict:
         """Route the query to appropriate specialist agent."""
         query_type = state.get("query_type", QueryType.GENERAL_INQUIRY)
-        has_document = state.get("document_content") is not None
+        has_document = self._document(state) is not None
         
         # Routing logic
         if not has_document and query_type != QueryType.GENERAL_INQUIRY:
@@ -82,24 +268,9 @@ The system includes advanced OCR with automatic rotation detection for scanned d
     def extract_clauses(self, state: LegalChatState) -> dict:
         """Specialized agent for finding and extracting specific clauses."""
         last_message = state["messages"][-1]
-        document = state.get("document_content", "")
-        metadata = state.get("document_metadata", {})
-        
-        # Truncate document for context window
-        doc_preview = document[:8000] + "..." if len(document) > 8000 else document
         
-        prompt = f"""
-{Config.LEGAL_CONTEXT}
-
-You are a legal clause extraction specialist for a US Collection Agency.
-
-DOCUMENT: {metadata.get('filename', 'Unknown')}
-PAGES: Multiple (check PAGE markers in content)
-
-DOCUMENT CONTENT:
-{doc_preview}
-
-USER QUERY: {last_message.content}
+        user_content = f"""
+QUERY: {last_message.content}
 
 TASK:
 1. Identify all clauses relevant to the query
@@ -111,40 +282,28 @@ TASK:
 Format your response with clear section headers and citations.
         """.strip()
         
-        response = self.llm.invoke([
-            {"role": "system", "content": "You are a legal clause extraction expert."},
-            {"role": "user", "content": prompt}
-        ])
+        response = self._ask(
+            "clause_extractor", state, last_message.content,
+            "Legal clause extraction specialist for a US Collection Agency.",
+            user_content, limit=8000
+        )
         
         return {"messages": [response]}
     
     def check_compliance(self, state: LegalChatState) -> dict:
         """Specialized agent for compliance checking."""
         last_message = state["messages"][-1]
-        document = state.get("document_content", "")
-        metadata = state.get("document_metadata", {})
-        
-        doc_preview = document[:8000] + "..." if len(document) > 8000 else document
         
-        prompt = f"""
-{Config.LEGAL_CONTEXT}
-
-You are a compliance specialist for US debt collection law.
+        user_content = f"""
+QUERY: {last_message.content}
 
-DOCUMENT: {metadata.get('filename', 'Unknown')}
-
-DOCUMENT CONTENT:
-{doc_preview}
-
-USER QUERY: {last_message.content}
-
-COMPLIANCE REVIEW FOR:
+TASK:
+Review the document for compliance with:
 - Fair Debt Collection Practices Act (FDCPA)
 - Telephone Consumer Protection Act (TCPA)
 - State-specific collection laws
 - CFPB regulations
 
-ANALYSIS FRAMEWORK:
 1. Identify relevant regulatory requirements
 2. Check document compliance with each requirement
 3. Flag violations or areas of concern
@@ -154,32 +313,19 @@ ANALYSIS FRAMEWORK:
 Be thorough and specific. This is critical for legal risk management.
         """.strip()
         
-        response = self.llm.invoke([
-            {"role": "system", "content": "You are a legal compliance auditor."},
-            {"role": "user", "content": prompt}
-        ])
+        response = self._ask(
+            "compliance_checker", state, last_message.content,
+            "Legal compliance auditor specializing in US debt collection law.",
+            user_content, limit=8000
+        )
         
         return {"messages": [response]}
     
     def summarize_document(self, state: LegalChatState) -> dict:
         """Create structured summaries of legal documents."""
-        document = state.get("document_content", "")
-        metadata = state.get("document_metadata", {})
-        
-        doc_preview = document[:10000] + "..." if len(document) > 10000 else document
-        
-        prompt = f"""
-{Config.LEGAL_CONTEXT}
-
-Provide a comprehensive legal summary of this document.
-
-DOCUMENT: {metadata.get('filename', 'Unknown')}
-SIZE: {metadata.get('word_count', 0):,} words
-
-CONTENT:
-{doc_preview}
-
-SUMMARY STRUCTURE:
+        user_content = """
+TASK:
+Provide a comprehensive legal summary of this document covering:
 1. Document Type & Purpose
 2. Key Parties Involved
 3. Material Terms & Obligations
@@ -193,31 +339,24 @@ SUMMARY STRUCTURE:
 Be concise but comprehensive. Focus on legally significant elements.
         """.strip()
         
-        response = self.llm.invoke([
-            {"role": "system", "content": "You are a legal document summarization expert."},
-            {"role": "user", "content": prompt}
-        ])
+        # The summary prompt does not depend on the query, so one entry serves every request
+        response = self._ask(
+            "summarizer", state, "document_summary",
+            "Legal document summarization expert.",
+            user_content, retrieval=False
+        )
         
         return {"messages": [response]}
     
     def assess_risk(self, state: LegalChatState) -> dict:
         """Assess legal risks in documents."""
         last_message = state["messages"][-1]
-        document = state.get("document_content", "")
-        
-        doc_preview = document[:8000] + "..." if len(document) > 8000 else document
         
-        prompt = f"""
-{Config.LEGAL_CONTEXT}
-
-Conduct a risk assessment of this legal document for a debt collection agency.
-
-DOCUMENT CONTENT:
-{doc_preview}
+        user_content = f"""
+QUERY: {last_message.content}
 
-USER QUERY: {last_message.content}
-
-RISK ASSESSMENT FRAMEWORK:
+TASK:
+Conduct a risk assessment of this document for a debt collection agency covering:
 1. Regulatory Compliance Risks (FDCPA, TCPA, state laws)
 2. Litigation Exposure
 3. Enforceability Issues
@@ -235,38 +374,101 @@ For each identified risk:
 Prioritize risks by severity and provide actionable recommendations.
         """.strip()
         
-        response = self.llm.invoke([
-            {"role": "system", "content": "You are a legal risk assessment specialist."},
-            {"role": "user", "content": prompt}
-        ])
+        response = self._ask(
+            "risk_assessor", state, last_message.content,
+            "Legal risk assessment specialist.",
+            user_content, limit=8000
+        )
         
         return {"messages": [response]}
     
     def general_assistance(self, state: LegalChatState) -> dict:
         """Handle general legal inquiries."""
         last_message = state["messages"][-1]
-        document = state.get("document_content", "")
-        
-        context = ""
-        if document:
-            doc_preview = document[:5000] + "..." if len(document) > 5000 else document
-            context = f"\n\nDOCUMENT CONTEXT:\n{doc_preview}"
         
-        prompt = f"""
-{Config.LEGAL_CONTEXT}
-
-You are a legal assistant for a US Collection Agency's legal department.
-{context}
-
-USER QUERY: {last_message.content}
+        user_content = f"""
+QUERY: {last_message.content}
 
+TASK:
 Provide a thorough, professional response addressing the query.
 Focus on practical application and cite relevant laws/regulations when applicable.
         """.strip()
         
-        response = self.llm.invoke([
-            {"role": "system", "content": "You are a helpful legal assistant."},
-            {"role": "user", "content": prompt}
-        ])
+        response = self._ask(
+            "general_assistant", state, last_message.content,
+            "Legal assistant for a US Collection Agency's legal department.",
+            user_content, limit=5000
+        )
         
         return {"messages": [response]}
+    
+    def full_report(self, state: LegalChatState, config: Optional[RunnableConfig] = None) -> FullReport:
+        """
+        Run summary, FDCPA, TCPA and risk analyses in a single structured call.
+        The document is sent once instead of once per analysis, through the
+        Gemini context cache when one exists.
+        
+        Args:
+            state: Current chat state with a loaded document
+            config: Runnable config for the LLM call (e.g. callbacks)
+            
+        Returns:
+            FullReport with one field per analysis
+        """
+        user_content = """
+TASK:
+Produce a full legal report on this document for a debt collection agency.
+
+REPORT SECTIONS:
+
+1. summary - Document type & purpose, key parties, material terms & obligations,
+   payment terms, important dates, dispute resolution provisions.
+
+2. fdcpa_findings - Fair Debt Collection Practices Act compliance: relevant
+   requirements, violations or concerns, recommendations, cited sections.
+
+3. tcpa_findings - Telephone Consumer Protection Act compliance: consent,
+   calling/texting provisions, violations or concerns, cited sections.
+
+4. risk_assessment - Regulatory, litigation, enforceability and financial risks,
+   each with severity (High/Medium/Low), likelihood and mitigation.
+
+Be thorough and specific in every section. Format each section with clear headers.
+        """.strip()
+        
+        report_llm = self.llm_deep.with_structured_output(FullReport)
+        user_content = f"Role: Senior legal analyst.\n\n{user_content}"
+        
+        # Like _ask: the context cache covers the whole document, not just the pinned head
+        handle = state.get("cache_handle")
+        if handle:
+            return self._cached_invoke("full_report", state, "full_report", [
+                {"role": "user", "content": user_content}
+            ], llm=report_llm, config=config, cached_content=handle)
+        
+        return self._cached_invoke("full_report", state, "full_report", [
+            self._system_message(state),
+            {"role": "user", "content": user_content}
+        ], llm=report_llm, config=config)
+
+
+@lru_cache(maxsize=1)
+def get_agent_nodes() -> LegalAgentNodes:
+    """
+    Get the process-wide agent nodes, shared by every chatbot session.
+    
+    Returns:
+        LegalAgentNodes instance (Gemini client and semantic cache created once)
+    """
+    return LegalAgentNodes()
+
+
+@lru_cache(maxsize=1)
+def warm_up_agents() -> None:
+    """
+    Warm up the shared agent nodes in a background thread, once per process.
+    The nodes are constructed in the calling thread so the first query never
+    waits on, or races with, their creation.
+    """
+    nodes = get_agent_nodes()
+    threading.Thread(target=nodes.warm_up, name="agent-warmup", daemon=True).start()
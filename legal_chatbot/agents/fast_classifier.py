@@ -0,0 +1,142 @@
+from legal_chatbot.models.query_models import QueryClassifier, QueryType
+from legal_chatbot.config import Config, logger
+from legal_chatbot.embeddings import embed_texts, embed_text
+from typing import Optional
+import re
+import numpy as np
+
+# ==================== Keyword Tagging ====================
+
+# Statutes a compliance answer is specific to
+STATUTE_TERMS = ["fdcpa", "tcpa", "cfpb"]
+
+QUERY_KEYWORDS = {
+    QueryType.CLAUSE_SEARCH: [
+        "clause", "clauses", "section", "provision", "provisions", "paragraph",
+        "term", "terms", "quote", "extract", "find", "cease and desist", "arbitration"
+    ],
+    QueryType.COMPLIANCE_CHECK: [
+        *STATUTE_TERMS, "compliant", "compliance", "violation", "violations",
+        "violate", "regulation", "regulations", "regulatory", "lawful"
+    ],
+    QueryType.DOCUMENT_SUMMARY: [
+        "summary", "summarize", "summarise", "overview", "outline", "recap",
+        "key points", "main points", "gist", "comprehensive"
+    ],
+    QueryType.RISK_ASSESSMENT: [
+        "risk", "risks", "risky", "risk assessment", "liability", "liabilities",
+        "exposure", "litigation", "lawsuit", "enforceability", "red flags"
+    ],
+    QueryType.GENERAL_INQUIRY: [
+        "what is", "what does", "explain", "define", "meaning", "difference",
+        "how does", "can we", "should we"
+    ]
+}
+
+# Definitions embedded as prototypes for each query type
+QUERY_DESCRIPTIONS = {
+    QueryType.CLAUSE_SEARCH: "Looking for specific clauses, sections or contract terms in the document",
+    QueryType.COMPLIANCE_CHECK: "Checking compliance with regulations such as FDCPA, TCPA and state collection laws",
+    QueryType.DOCUMENT_SUMMARY: "Requesting an overview or summary of the document",
+    QueryType.RISK_ASSESSMENT: "Identifying legal risks, liabilities or litigation exposure",
+    QueryType.GENERAL_INQUIRY: "General legal question about debt collection or the document"
+}
+
+_STATUTE_PATTERNS = [(term, re.compile(rf"\b{term}\b")) for term in STATUTE_TERMS]
+# Numbers (clause 5, 15 U.S.C. 1692g), lettered subsections such as (a), and section signs
+_REFERENCE_PATTERN = re.compile(r"\w*\d\w*|\([a-z]\)|§")
+
+
+def query_references(query: str) -> frozenset:
+    """
+    Collect the numbers, statutes and section references in a query.
+    Queries differing only in these embed almost identically but need different answers.
+    
+    Args:
+        query: User query text
+    
+    Returns:
+        Set of lowercase reference tokens
+    """
+    text = query.lower()
+    references = set(_REFERENCE_PATTERN.findall(text))
+    references.update(term for term, pattern in _STATUTE_PATTERNS if pattern.search(text))
+    return frozenset(references)
+
+
+class FastClassifier:
+    """
+    Local query classifier that avoids an LLM round-trip for clear-cut queries.
+    Uses keyword tagging first, then cosine similarity to embedded prototypes.
+    """
+    
+    def __init__(self):
+        self._patterns = {
+            query_type: [(term, re.compile(rf"\b{re.escape(term)}\b")) for term in terms]
+            for query_type, terms in QUERY_KEYWORDS.items()
+        }
+        self._types = list(QUERY_DESCRIPTIONS)
+        self._prototypes: Optional[np.ndarray] = None
+    
+    def warm_up(self) -> None:
+        """Load the embedding model and prototype vectors ahead of the first query."""
+        if self._prototypes is None:
+            self._prototypes = embed_texts([QUERY_DESCRIPTIONS[t] for t in self._types])
+    
+    def _keyword_hits(self, query: str) -> dict:
+        text = query.lower()
+        return {
+            query_type: [term for term, pattern in patterns if pattern.search(text)]
+            for query_type, patterns in self._patterns.items()
+        }
+    
+    def classify(self, query: str) -> Optional[QueryClassifier]:
+        """
+        Classify a query locally.
+        
+        Args:
+            query: User query text
+        
+        Returns:
+            QueryClassifier result, or None if the query is ambiguous and should
+            be classified by the LLM
+        """
+        hits = self._keyword_hits(query)
+        ranked = sorted(hits, key=lambda query_type: len(hits[query_type]), reverse=True)
+        best, runner_up = ranked[0], ranked[1]
+        key_terms = hits[best]
+        
+        if len(key_terms) >= Config.FAST_CLASSIFIER_MIN_KEYWORD_HITS and len(key_terms) > len(hits[runner_up]):
+            total = sum(len(terms) for terms in hits.values())
+            logger.debug(f"Keyword classification: {best.value} ({key_terms})")
+            return QueryClassifier(
+                query_type=best,
+                confidence=len(key_terms) / total,
+                key_terms=key_terms
+            )
+        
+        return self._classify_by_embedding(query, key_terms)
+    
+    def _classify_by_embedding(self, query: str, key_terms: list[str]) -> Optional[QueryClassifier]:
+        self.warm_up()
+        if self._prototypes is None:
+            return None
+        
+        embedding = embed_text(query)
+        if embedding is None:
+            return None
+        
+        scores = self._prototypes @ embedding
+        second, first = np.argsort(scores)[-2:]
+        margin = float(scores[first] - scores[second])
+        
+        if margin < Config.FAST_CLASSIFIER_MIN_MARGIN:
+            return None
+        
+        query_type = self._types[int(first)]
+        logger.debug(f"Embedding classification: {query_type.value} (margin {margin:.3f})")
+        return QueryClassifier(
+            query_type=query_type,
+            confidence=float(np.clip(scores[first], 0.0, 1.0)),
+            key_terms=key_terms
+        )
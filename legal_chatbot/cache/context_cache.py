@@ -0,0 +1,75 @@
+from legal_chatbot.config import Config, logger
+from typing import Optional
+
+try:
+    from google.ai import generativelanguage_v1beta as genai
+    from google.protobuf import duration_pb2
+except ImportError:
+    genai = None
+
+_client = None
+
+
+def _get_client():
+    """Create the Gemini cache service client on first use."""
+    global _client
+    if _client is None:
+        _client = genai.CacheServiceClient(
+            client_options={"api_key": Config.GOOGLE_API_KEY}
+        )
+    return _client
+
+
+def create_context_cache(document: str, filename: str) -> Optional[str]:
+    """
+    Upload a document to Gemini's explicit context cache.
+    
+    Args:
+        document: Extracted document text
+        filename: Document name shown to the model
+        
+    Returns:
+        Cached-content name (e.g. "cachedContents/abc"), or None if caching is
+        disabled, unavailable, or the document is too small to cache
+    """
+    if not Config.CONTEXT_CACHE_ENABLED or genai is None:
+        return None
+    
+    if len(document) < Config.CONTEXT_CACHE_MIN_CHARS:
+        return None
+    
+    try:
+        cached = _get_client().create_cached_content(
+            cached_content=genai.CachedContent(
+                model=f"models/{Config.LLM_MODEL_DEEP}",
+                display_name=filename[:128],
+                system_instruction=genai.Content(parts=[genai.Part(text=Config.LEGAL_CONTEXT)]),
+                contents=[genai.Content(
+                    role="user",
+                    parts=[genai.Part(text=f"DOCUMENT ({filename}):\n{document}")]
+                )],
+                ttl=duration_pb2.Duration(seconds=Config.CONTEXT_CACHE_TTL_SECONDS)
+            )
+        )
+        logger.info(f"Created Gemini context cache {cached.name} for {filename}")
+        return cached.name
+    except Exception as e:
+        logger.warning(f"Gemini context caching unavailable, sending document inline: {e}")
+        return None
+
+
+def delete_context_cache(name: Optional[str]) -> None:
+    """
+    Delete a Gemini context cache, ignoring errors (it expires on its own).
+    
+    Args:
+        name: Cached-content name returned by create_context_cache
+    """
+    if not name or genai is None:
+        return
+    
+    try:
+        _get_client().delete_cached_content(name=name)
+        logger.info(f"Deleted Gemini context cache {name}")
+    except Exception as e:
+        logger.debug(f"Could not delete context cache {name}: {e}")
@@ -0,0 +1,29 @@
+from legal_chatbot.config import Config, logger
+from functools import lru_cache
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+
+@lru_cache(maxsize=1)
+def get_disk_cache():
+    """
+    Open the persistent on-disk cache shared by all chatbot caches.
+    
+    Returns:
+        diskcache.Cache instance, or None if disabled or unavailable
+    """
+    if not Config.DISK_CACHE_ENABLED:
+        return None
+    
+    if diskcache is None:
+        logger.info("diskcache not installed; caches will not persist across restarts")
+        return None
+    
+    try:
+        return diskcache.Cache(Config.CACHE_DIR)
+    except Exception as e:
+        logger.warning(f"Could not open disk cache at {Config.CACHE_DIR}: {e}")
+        return None
@@ -0,0 +1,84 @@
+from legal_chatbot.config import Config, logger
+from legal_chatbot.cache.disk_cache import get_disk_cache
+from collections import OrderedDict
+from typing import Optional
+import threading
+
+
+class ResponseCache:
+    """
+    Exact-match cache of final chatbot responses.
+    Keeps a bounded in-memory LRU and mirrors entries to the disk cache so
+    they survive Streamlit reruns and process restarts.
+    """
+    
+    _PREFIX = "response"
+    
+    def __init__(self, maxsize: int = Config.RESPONSE_CACHE_SIZE):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of responses kept in memory
+        """
+        self.maxsize = maxsize
+        self._memory: OrderedDict[tuple, dict] = OrderedDict()
+        self._disk = get_disk_cache()
+        self._lock = threading.Lock()
+    
+    def get(self, doc_hash: str, query: str) -> Optional[dict]:
+        """
+        Look up a cached response.
+        
+        Args:
+            doc_hash: Hash of the loaded document ("" if none)
+            query: Exact user input
+            
+        Returns:
+            Cached response record, or None on a miss
+        """
+        key = (self._PREFIX, doc_hash, query)
+        
+        with self._lock:
+            record = self._memory.get(key)
+            if record is not None:
+                self._memory.move_to_end(key)
+                return record
+        
+        if self._disk is None:
+            return None
+        
+        try:
+            record = self._disk.get(key)
+        except Exception as e:
+            logger.debug(f"Disk cache read failed: {e}")
+            return None
+        
+        if record is not None:
+            self._remember(key, record)
+        return record
+    
+    def put(self, doc_hash: str, query: str, record: dict) -> None:
+        """
+        Store a response record.
+        
+        Args:
+            doc_hash: Hash of the loaded document ("" if none)
+            query: Exact user input
+            record: Response content and routing metadata
+        """
+        key = (self._PREFIX, doc_hash, query)
+        self._remember(key, record)
+        
+        if self._disk is not None:
+            try:
+                self._disk.set(key, record, expire=Config.CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.debug(f"Disk cache write failed: {e}")
+    
+    def _remember(self, key: tuple, record: dict) -> None:
+        with self._lock:
+            self._memory[key] = record
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
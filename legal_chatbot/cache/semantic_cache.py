@@ -0,0 +1,185 @@
+from legal_chatbot.config import Config, logger
+from legal_chatbot.embeddings import embed_text
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import threading
+import numpy as np
+
+
+def document_namespace(node: str, document_digest: Optional[str]) -> str:
+    """
+    Build a cache namespace so responses never leak across agents or documents.
+    
+    Args:
+        node: Name of the agent node making the call
+        document_digest: Hash of the full loaded document text (or None)
+    
+    Returns:
+        Namespace string of the form "<node>:<document hash>"
+    """
+    return f"{node}:{document_digest or ''}"
+
+
+class _Namespace:
+    """Stored keys, responses and key embeddings for a single namespace."""
+    
+    def __init__(self):
+        self.exact: dict[str, Any] = {}
+        # Keys with an embedding, mapped to (embedding, references)
+        self.semantic: dict[str, tuple[np.ndarray, Optional[frozenset]]] = {}
+        self._matrix: Optional[np.ndarray] = None
+    
+    def remove(self, key: str) -> None:
+        self.exact.pop(key, None)
+        if self.semantic.pop(key, None) is not None:
+            self._matrix = None
+    
+    def embeddings(self) -> tuple[list[str], Optional[np.ndarray], list[Optional[frozenset]]]:
+        """Keys, stacked embeddings and references of the semantic entries, in one order."""
+        if not self.semantic:
+            return [], None, []
+        if self._matrix is None:
+            self._matrix = np.stack([embedding for embedding, _ in self.semantic.values()])
+        return list(self.semantic), self._matrix, [references for _, references in self.semantic.values()]
+
+
+class SemanticCache:
+    """
+    In-memory semantic cache for LLM responses.
+    Returns a stored response when a new key is an exact match or its embedding
+    is within the cosine similarity threshold of a previously seen key with
+    the same references.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = Config.SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = Config.SEMANTIC_CACHE_MAX_ENTRIES,
+        references: Optional[Callable[[str], frozenset]] = None
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a semantic hit
+            max_entries: Maximum number of responses kept across all namespaces
+            references: Extracts tokens (numbers, statutes) that must be identical
+                for a semantic hit; without it any similar key can hit
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.references = references
+        self._namespaces: dict[str, _Namespace] = {}
+        # Every entry as (namespace, normalized key), least recently used first
+        self._lru: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(key_text: str) -> str:
+        return " ".join(key_text.lower().split())
+    
+    def get(self, namespace: str, key_text: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+        
+        Args:
+            namespace: Cache namespace (see document_namespace)
+            key_text: Text identifying the request, typically the user query
+        
+        Returns:
+            Cached response, or None on a miss
+        """
+        normalized = self._normalize(key_text)
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                return None
+            
+            response = entry.exact.get(normalized)
+            if response is not None:
+                self._lru.move_to_end((namespace, normalized))
+                logger.debug(f"Exact cache hit in {namespace}")
+                return response
+            
+            keys, embeddings, stored_references = entry.embeddings()
+        
+        if embeddings is None:
+            return None
+        
+        query = embed_text(key_text)
+        if query is None:
+            return None
+        
+        # "clause 5" and "clause 7", or FDCPA and TCPA, embed almost identically
+        scores = embeddings @ query
+        if self.references is not None:
+            references = self.references(key_text)
+            scores = np.where([r == references for r in stored_references], scores, -np.inf)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        
+        with self._lock:
+            # The entry may have been evicted while scoring outside the lock
+            response = entry.exact.get(keys[best])
+            if response is None:
+                return None
+            self._lru.move_to_end((namespace, keys[best]))
+        logger.debug(f"Semantic cache hit in {namespace} (similarity {scores[best]:.3f})")
+        return response
+    
+    def put(self, namespace: str, key_text: str, response: Any) -> None:
+        """
+        Store a response under the given key.
+        
+        Args:
+            namespace: Cache namespace (see document_namespace)
+            key_text: Text identifying the request
+            response: Response to cache
+        """
+        embedding = embed_text(key_text)
+        references = self.references(key_text) if self.references is not None else None
+        normalized = self._normalize(key_text)
+        
+        with self._lock:
+            entry = self._namespaces.setdefault(namespace, _Namespace())
+            entry.remove(normalized)
+            entry.exact[normalized] = response
+            if embedding is not None:
+                entry.semantic[normalized] = (embedding, references)
+            self._lru[(namespace, normalized)] = None
+            self._lru.move_to_end((namespace, normalized))
+            
+            # Evict least recently used entries once over capacity
+            while len(self._lru) > self.max_entries:
+                (evicted_namespace, evicted_key), _ = self._lru.popitem(last=False)
+                evicted = self._namespaces[evicted_namespace]
+                evicted.remove(evicted_key)
+                if not evicted.exact:
+                    del self._namespaces[evicted_namespace]
+    
+    def get_or_compute(self, namespace: str, key_text: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return a cached response or compute, store and return a new one.
+        
+        Args:
+            namespace: Cache namespace (see document_namespace)
+            key_text: Text identifying the request
+            compute: Zero-argument callable producing the response on a miss
+        
+        Returns:
+            Cached or freshly computed response
+        """
+        response = self.get(namespace, key_text)
+        if response is not None:
+            return response
+        
+        response = compute()
+        self.put(namespace, key_text, response)
+        return response
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._namespaces.clear()
+            self._lru.clear()
@@ -1,13 +1,24 @@
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
 from legal_chatbot.config import Config, logger
-from langchain_core.messages import HumanMessage
-from legal_chatbot.workflow.graph import build_legal_graph
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage
+from legal_chatbot.cache.response_cache import ResponseCache
+from legal_chatbot.cache.context_cache import create_context_cache, delete_context_cache
+from legal_chatbot.workflow.graph import get_legal_graph
+from legal_chatbot.agents.classifier import get_agent_nodes
 from legal_chatbot.document_processing.processor import AdvancedDocumentProcessor
-from legal_chatbot.models.query_models import LegalChatState
+from legal_chatbot.document_processing.retrieval import chunk_document, build_bm25_index, split_pinned
+from legal_chatbot.models.query_models import LegalChatState, LoadedDocument, FullReport, DOCUMENT_MESSAGE_ID
+from legal_chatbot.telemetry.callbacks import UsageCallbackHandler
+import asyncio
+import hashlib
+import time
 
 class LegalChatbot:
     """Main chatbot interface with advanced document management."""
     
+    # Graph nodes whose LLM output is routing data, not part of the answer
+    _INTERNAL_NODES = {"classifier", "router"}
+    
     def __init__(self, tesseract_path: Optional[str] = None, dpi: int = Config.DEFAULT_DPI):
         """
         Initialize the legal chatbot.
@@ -16,19 +27,28 @@ class LegalChatbot:
             tesseract_path: Path to Tesseract executable (optional)
             dpi: DPI for scanned PDF processing
         """
-        self.graph = build_legal_graph()
+        # Graph and agent nodes are compiled once per process and shared across sessions
+        self.agent_nodes = get_agent_nodes()
+        self.graph = get_legal_graph()
         self.state: LegalChatState = {
             "messages": [],
             "query_type": None,
-            "document_content": None,
+            "document_id": None,
             "document_metadata": None,
             "analysis_results": None,
-            "routing_decision": None
+            "routing_decision": None,
+            "cache_handle": None
         }
+        # Strong reference to the loaded document; the agents only hold it weakly
+        self.document: Optional[LoadedDocument] = None
         self.doc_processor = AdvancedDocumentProcessor(
             tesseract_path=tesseract_path,
             dpi=dpi
         )
+        self.response_cache = ResponseCache()
+        self.document_hash = ""
+        self._context_cache_expiry = 0.0
+        self.usage = UsageCallbackHandler()
     
     def load_document(self, file_path: str) -> str:
         """
@@ -42,9 +62,19 @@ class LegalChatbot:
         """
         try:
             text, metadata = self.doc_processor.process_document(file_path)
-            self.state["document_content"] = text
             self.state["document_metadata"] = metadata
             
+            # Pin the document head once; only text past it is retrieved per query
+            head, remainder, remainder_page = split_pinned(text, Config.PINNED_DOCUMENT_CHARS)
+            self._pin_document(head, metadata, truncated=bool(remainder))
+            chunks = chunk_document(remainder, start_page=remainder_page)
+            self.document_hash = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+            self.document = LoadedDocument(text, chunks, build_bm25_index(chunks), self.document_hash)
+            self.state["document_id"] = self.agent_nodes.register_document(self.document)
+            
+            # Replace any context cache held for the previous document
+            self._refresh_context_cache()
+            
             return f"""
 ✓ Document loaded successfully!
 
@@ -61,15 +91,63 @@ You can now ask questions about this document.
             logger.error(f"Error loading document: {e}")
             return f"✗ Error loading document: {str(e)}"
     
+    def _pin_document(self, head: str, metadata: Dict, truncated: bool) -> None:
+        """
+        Put the document head in a system message at the start of the conversation.
+        Agents reuse it as their stable prompt prefix on every turn.
+        
+        Args:
+            head: Pinned leading part of the document text
+            metadata: Document metadata
+            truncated: Whether the document continues past the head
+        """
+        content = (
+            f"{Config.LEGAL_CONTEXT}\n\n"
+            f"DOCUMENT ({metadata['filename']}, {metadata['word_count']:,} words, see PAGE markers):\n{head}"
+        )
+        if truncated:
+            content += "\n\n[Document continues; relevant later excerpts are provided with each query.]"
+        
+        self._unpin_document()
+        self.state["messages"].insert(0, SystemMessage(content=content, id=DOCUMENT_MESSAGE_ID))
+    
+    def _unpin_document(self) -> None:
+        """Remove the pinned document message from the conversation."""
+        self.state["messages"] = [
+            message for message in self.state["messages"] if message.id != DOCUMENT_MESSAGE_ID
+        ]
+    
+    def _refresh_context_cache(self) -> None:
+        """Recreate the Gemini context cache for the loaded document."""
+        delete_context_cache(self.state["cache_handle"])
+        self.state["cache_handle"] = None
+        
+        if self.document:
+            self.state["cache_handle"] = create_context_cache(
+                self.document.content,
+                self.state["document_metadata"]["filename"]
+            )
+            # Renew a minute early so requests never reference an expired cache
+            self._context_cache_expiry = time.monotonic() + Config.CONTEXT_CACHE_TTL_SECONDS - 60
+    
+    def _ensure_context_cache(self) -> None:
+        """Renew the context cache if its TTL is about to run out."""
+        if self.state["cache_handle"] and time.monotonic() >= self._context_cache_expiry:
+            self._refresh_context_cache()
+    
     def clear_document(self) -> str:
         """Clear the currently loaded document."""
-        self.state["document_content"] = None
+        self.document = None
+        self.state["document_id"] = None
         self.state["document_metadata"] = None
+        self._unpin_document()
+        self.document_hash = ""
+        self._refresh_context_cache()
         return "✓ Document cleared from memory."
     
     def show_document_info(self) -> str:
         """Display information about the currently loaded document."""
-        if not self.state["document_content"]:
+        if not self.document:
             return "No document currently loaded."
         
         metadata = self.state["document_metadata"]
@@ -82,6 +160,38 @@ Current Document:
   Characters: {metadata['char_count']:,}
         """.strip()
     
+    def _run_config(self, node: Optional[str] = None) -> Dict:
+        """Runnable config attaching this session's usage telemetry."""
+        config = {"callbacks": [self.usage]}
+        if node:
+            config["metadata"] = {"usage_node": node}
+        return config
+    
+    def _serve_cached(self, user_input: str) -> Optional[str]:
+        """Apply a cached response to the state, returning its content on a hit."""
+        cached = self.response_cache.get(self.document_hash, user_input)
+        if cached is None:
+            return None
+        
+        logger.info("Serving response from exact-match cache")
+        self.state["messages"].append(AIMessage(content=cached["content"]))
+        self.state["query_type"] = cached["query_type"]
+        self.state["routing_decision"] = cached["routing_decision"]
+        return cached["content"]
+    
+    def _cache_response(self, user_input: str) -> Optional[str]:
+        """Record the last assistant message for this query, returning its content."""
+        if not self.state["messages"]:
+            return None
+        
+        last_message = self.state["messages"][-1]
+        self.response_cache.put(self.document_hash, user_input, {
+            "content": last_message.content,
+            "query_type": self.state.get("query_type"),
+            "routing_decision": self.state.get("routing_decision")
+        })
+        return last_message.content
+    
     def process_query(self, user_input: str) -> str:
         """
         Process a user query through the legal chatbot graph.
@@ -95,16 +205,134 @@ Current Document:
         # Add user message to state
         self.state["messages"].append(HumanMessage(content=user_input))
         
+        # Serve repeated queries on the same document without running the graph
+        cached = self._serve_cached(user_input)
+        if cached is not None:
+            return cached
+        
         # Run through graph
-        self.state = self.graph.invoke(self.state)
+        self._ensure_context_cache()
+        self.state = self.graph.invoke(self.state, config=self._run_config())
         
         # Return last assistant message
-        if self.state["messages"]:
-            last_message = self.state["messages"][-1]
-            return last_message.content
+        response = self._cache_response(user_input)
+        if response is not None:
+            return response
         
         return "Error: No response generated."
     
+    def process_query_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Process a user query, yielding the response text as tokens arrive.
+        
+        Args:
+            user_input: The user's question or request
+            
+        Yields:
+            Response text fragments in order
+        """
+        self.state["messages"].append(HumanMessage(content=user_input))
+        
+        cached = self._serve_cached(user_input)
+        if cached is not None:
+            yield cached
+            return
+        
+        self._ensure_context_cache()
+        streamed = False
+        for mode, payload in self.graph.stream(
+            self.state, config=self._run_config(), stream_mode=["messages", "values"]
+        ):
+            if mode == "values":
+                self.state = payload
+                continue
+            
+            message, metadata = payload
+            if metadata.get("langgraph_node") in self._INTERNAL_NODES:
+                continue
+            if not isinstance(message.content, str) or not message.content:
+                continue
+            
+            # Token chunks come from the LLM; a whole message is only emitted by
+            # nodes that did not stream (cache hits, document_request)
+            if isinstance(message, AIMessageChunk):
+                streamed = True
+                yield message.content
+            elif not streamed:
+                yield message.content
+        
+        self._cache_response(user_input)
+    
+    async def _analyze_isolated(self, user_input: str) -> Dict:
+        """Run one query on a private copy of the state, returning its cache record."""
+        cached = self.response_cache.get(self.document_hash, user_input)
+        if cached is not None:
+            return cached
+        
+        state = {**self.state, "messages": [*self.state["messages"], HumanMessage(content=user_input)]}
+        result = await self.graph.ainvoke(state, config=self._run_config())
+        
+        record = {
+            "content": result["messages"][-1].content,
+            "query_type": result.get("query_type"),
+            "routing_decision": result.get("routing_decision")
+        }
+        self.response_cache.put(self.document_hash, user_input, record)
+        return record
+    
+    async def quick_analyze_all(self, queries: List[str]) -> List[Dict]:
+        """
+        Run several independent queries concurrently through the graph.
+        
+        Args:
+            queries: User queries to answer, e.g. the Quick Action prompts
+            
+        Returns:
+            One record per query (content, query_type, routing_decision), in order
+        """
+        self._ensure_context_cache()
+        records = await asyncio.gather(*(self._analyze_isolated(query) for query in queries))
+        
+        # Record the exchanges in the conversation in the order they were asked
+        for query, record in zip(queries, records):
+            self.state["messages"].append(HumanMessage(content=query))
+            self.state["messages"].append(AIMessage(content=record["content"]))
+        if records:
+            self.state["query_type"] = records[-1]["query_type"]
+            self.state["routing_decision"] = records[-1]["routing_decision"]
+        
+        return list(records)
+    
+    def generate_full_report(self) -> FullReport:
+        """
+        Generate summary, FDCPA, TCPA and risk analyses in one batched LLM call.
+        
+        Returns:
+            FullReport with one field per analysis
+        """
+        if not self.document:
+            raise ValueError("Load a document before generating a full report")
+        
+        self._ensure_context_cache()
+        report = self.agent_nodes.full_report(self.state, config=self._run_config("full_report"))
+        
+        self.state["messages"].append(HumanMessage(content="Generate a full report of this document"))
+        self.state["messages"].append(AIMessage(content=f"""
+## Summary
+{report.summary}
+
+## FDCPA Findings
+{report.fdcpa_findings}
+
+## TCPA Findings
+{report.tcpa_findings}
+
+## Risk Assessment
+{report.risk_assessment}
+        """.strip()))
+        
+        return report
+    
     def run(self):
         """Run the interactive chatbot CLI."""
         print("=" * 70)
@@ -148,8 +376,10 @@ Current Document:
                 
                 # Process query
                 print("\n⚖️  Analyzing...\n")
-                response = self.process_query(user_input)
-                print(f"Assistant:\n{response}")
+                print("Assistant:")
+                for token in self.process_query_stream(user_input):
+                    print(token, end="", flush=True)
+                print()
                 
             except KeyboardInterrupt:
                 print("\n\n✓ Exiting chatbot. Goodbye!")
@@ -18,14 +18,55 @@ class Config:
     
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     # LLM Configuration
-    LLM_MODEL = "gemini-2.5-flash"
+    LLM_MODEL_FAST = "gemini-2.5-flash-lite"  # Query classification fallback
+    LLM_MODEL_DEEP = "gemini-2.5-flash"  # Specialist analysis and reports
     LLM_TEMPERATURE = 0.1  # Low temperature for consistent legal analysis
     
+    # Local query classification (falls back to the LLM when ambiguous)
+    FAST_CLASSIFIER_MIN_KEYWORD_HITS = 2
+    FAST_CLASSIFIER_MIN_MARGIN = 0.05  # Required top-1 vs top-2 cosine margin
+    
     # Document Processing
     SUPPORTED_FORMATS = ['.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp']
     MAX_DOCUMENT_SIZE_MB = 50
     DEFAULT_DPI = 300  # DPI for PDF to image conversion
-    OCR_CONFIG = r'--oem 3 --psm 6'  # Tesseract configuration
+    OCR_DPI = int(os.getenv("SUEBOT_OCR_DPI", 200))  # Cap on the DPI PDF pages are rendered at for OCR
+    PDF_RASTER_BACKEND = os.getenv("SUEBOT_PDF_BACKEND", "pymupdf")  # "pymupdf" or "pdf2image"
+    OCR_CONFIG_DENSE = r'--oem 1 --psm 6'  # Uniform block of body text, e.g. contract pages
+    OCR_CONFIG_MIXED = r'--oem 1 --psm 3'  # Full layout analysis for columns and mixed layouts
+    OCR_CONFIG_SPARSE = r'--oem 1 --psm 11'  # Scattered text such as forms
+    OCR_CONFIG = OCR_CONFIG_DENSE  # Tesseract configuration when the layout is not detected
+    OCR_LAYOUT_DETECTION = True  # Choose the page segmentation mode per page from its ink layout
+    OCR_SPARSE_ROW_COVERAGE = 0.35  # Below this share of inked rows in the text block, a page is sparse
+    OCR_MIN_GUTTER = 0.03  # Blank column run (share of text width) that marks a multi-column page
+    NATIVE_TEXT_MIN_CHARS = 50  # Pages with less embedded text than this are OCRed (e.g. scans with a stamped footer)
+    OCR_WORKERS = int(os.getenv("SUEBOT_OCR_WORKERS", os.cpu_count() or 1))  # Processes for per-page OCR
+    OSD_ONCE_PER_DOCUMENT = True  # Detect rotation on the first page and assume it for the rest
+    OSD_MIN_CONFIDENCE = 2.0  # Below this, rotation is detected on every page
+    OSD_MAX_SIDE = 1000  # Long edge in pixels of the downscaled copy used for rotation detection
+    DENOISE_STRENGTH = os.getenv("SUEBOT_DENOISE", "median")  # "none", "median" or "nlm" (non-local means)
+    DENOISE_MIN_NOISE = 1.5  # Mean background noise level below which a scan is treated as clean
+    
+    # Retrieval (text past the pinned head is sent as query-relevant chunks)
+    CHUNK_WORDS = 375  # ~500 tokens per chunk
+    RETRIEVAL_TOP_K = 10
+    PINNED_DOCUMENT_CHARS = 20000  # Document head pinned as the conversation's system message
+    
+    # Caching
+    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND = os.getenv("SUEBOT_EMBEDDING_BACKEND", "onnx")  # "onnx" or "torch"
+    EMBEDDING_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"  # int8 export shipped with the model
+    EMBEDDING_MEMO_SIZE = 256  # Recent single-text embeddings shared by classifier and cache
+    SEMANTIC_CACHE_THRESHOLD = 0.95  # Cosine similarity required for a cache hit
+    SEMANTIC_CACHE_MAX_ENTRIES = 1000
+    RESPONSE_CACHE_SIZE = 256  # In-memory exact-match responses per chatbot
+    CACHE_DIR = os.getenv("SUEBOT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".suebot_cache"))
+    DISK_CACHE_ENABLED = os.getenv("SUEBOT_DISK_CACHE", "1") != "0"
+    CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+    DOCUMENT_CACHE_ENABLED = os.getenv("SUEBOT_CACHE_DOCUMENTS", "0") == "1"  # Persist extracted document text (opt-in)
+    CONTEXT_CACHE_ENABLED = True  # Gemini explicit context caching of loaded documents
+    CONTEXT_CACHE_TTL_SECONDS = 60 * 60
+    CONTEXT_CACHE_MIN_CHARS = 8000  # Gemini rejects caches below ~1024-2048 tokens
     
     # Legal Domain Settings
     LEGAL_CONTEXT = """US Collection Agency - Legal Department
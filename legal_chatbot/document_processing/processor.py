@@ -1,17 +1,111 @@
+from __future__ import annotations
 from legal_chatbot.config import Config, logger
+from legal_chatbot.cache.disk_cache import get_disk_cache
 from pathlib import Path
-from typing import Optional, Dict, Tuple
-try:
-    import pytesseract
-    from PIL import Image
-    from pdf2image import convert_from_path
-    import numpy as np
-    import cv2
-    import PyPDF2
-except ImportError as e:
-    print(f"Missing required library: {e}")
+from typing import Optional, Dict, Iterator, List, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import hashlib
+import importlib
+import importlib.metadata
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def _lazy_import(*names: str) -> Optional[_LazyModule]:
+    """Lazily import the first installed module of names, or None if none is installed."""
+    for name in names:
+        if importlib.util.find_spec(name) is not None:
+            return _LazyModule(name)
+    return None
+
+
+# Heavy imaging and OCR libraries (cv2 and pytesseract alone take ~0.8s) load on first use,
+# and the Tesseract version check waits for the first OCR, so the CLI, the app and
+# native-PDF extraction do not pay for what they never call
+_missing = [name for name in ("pytesseract", "PIL", "pdf2image", "numpy", "cv2", "PyPDF2")
+            if importlib.util.find_spec(name) is None]
+if _missing:
+    print(f"Missing required library: {', '.join(_missing)}")
     print("Install with: pip install PyPDF2 Pillow pytesseract pdf2image numpy opencv-python")
-    raise
+    raise ImportError(f"Missing required libraries: {', '.join(_missing)}")
+
+pytesseract = _LazyModule("pytesseract")
+Image = _LazyModule("PIL.Image")
+pdf2image = _LazyModule("pdf2image")
+np = _LazyModule("numpy")
+cv2 = _LazyModule("cv2")
+PyPDF2 = _LazyModule("PyPDF2")
+blake3 = _lazy_import("blake3")  # Much faster than SHA-256 for hashing large scans
+pdfium = _lazy_import("pypdfium2")  # PDFium text layer: faster and better recall than PyPDF2
+fitz = _lazy_import("pymupdf", "fitz")  # Renders PDF pages without poppler, one at a time
+tesserocr = _lazy_import("tesserocr")  # In-process libtesseract: no subprocess or model load per call
+
+# OCR work item: (image or PDF path, page number, whether the path is a PDF to render, rotation hint)
+PageTask = Tuple[str, int, bool, Optional[int]]
+# (page_num, text, error)
+PageResult = Tuple[int, str, Optional[str]]
+
+# cv2.rotate codes for clockwise corrections by quarter turns
+_CV2_ROTATIONS = {90: "ROTATE_90_CLOCKWISE", 180: "ROTATE_180", 270: "ROTATE_90_COUNTERCLOCKWISE"}
+
+# Banner written before every page of extracted text
+_BAR = "=" * 60
+_BANNER_TEMPLATE = f"\n{_BAR}\nPAGE {{}}\n{_BAR}\n\n"
+
+# Config prefixes of settings that affect extracted text (see _ocr_settings)
+_TEXT_SETTING_PREFIXES = ("OCR_", "OSD_", "DENOISE_", "NATIVE_", "PDF_RASTER_")
+_NON_TEXT_SETTINGS = {"OCR_WORKERS"}  # Changes speed, not output
+
+
+class _TextBuilder:
+    """Accumulates extracted text in a buffer, counting characters and words as they arrive."""
+    
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self.char_count = 0
+        self.word_count = 0
+        self.last_char = ""
+        self.failed_pages = 0  # Pages whose OCR failed, so the text is incomplete
+    
+    def add(self, part: str) -> None:
+        # Parts are joined on whitespace boundaries, so per-part word counts sum exactly.
+        # A part is at most a page, so the split list is short-lived, and str.split
+        # counts several times faster than iterating regex matches.
+        if not part:
+            return
+        self._buffer.write(part)
+        self.char_count += len(part)
+        self.word_count += len(part.split())
+        self.last_char = part[-1]
+    
+    def clear(self) -> None:
+        self._buffer = io.StringIO()
+        self.char_count = 0
+        self.word_count = 0
+        self.last_char = ""
+        self.failed_pages = 0
+    
+    def text(self) -> str:
+        return self._buffer.getvalue()
+
 
 class AdvancedDocumentProcessor:
     """
@@ -28,17 +122,142 @@ class AdvancedDocumentProcessor:
             dpi: DPI for PDF to image conversion
         """
         self.dpi = dpi
+        self._tess_apis: Dict[str, "tesserocr.PyTessBaseAPI"] = {}
+        self._tess_lock = threading.Lock()
+        self._tesseract_checked = False
+        self._tesseract_version: Optional[str] = None
         
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
-        
-        # Verify Tesseract installation
+    
+    def _check_tesseract(self) -> None:
+        """Verify the Tesseract installation once, when OCR is first needed."""
+        if self._tesseract_checked:
+            return
+        self._tesseract_checked = True
         try:
-            pytesseract.get_tesseract_version()
-            logger.info(f"Tesseract version: {pytesseract.get_tesseract_version()}")
+            self._tesseract_version = str(pytesseract.get_tesseract_version())
+            logger.info(f"Tesseract version: {self._tesseract_version}")
         except Exception as e:
             logger.warning(f"Tesseract not found: {e}. OCR functionality will be limited.")
     
+    # ==================== Tesseract Engine ====================
+    
+    def _tess_api(self, mode: str) -> Optional["tesserocr.PyTessBaseAPI"]:
+        """
+        Get the in-process tesserocr engine for OCR ("ocr") or orientation
+        detection ("osd"), creating it on first use so models load once per process.
+        
+        Args:
+            mode: "ocr" or "osd"
+            
+        Returns:
+            PyTessBaseAPI instance, or None if tesserocr is unavailable
+        """
+        if tesserocr is None:
+            return None
+        
+        api = self._tess_apis.get(mode)
+        if api is None:
+            try:
+                if mode == "osd":
+                    api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.OSD_ONLY)
+                else:
+                    # Mirror the engine mode of Config.OCR_CONFIG; ocr_image sets the PSM per page
+                    psm = _config_option(Config.OCR_CONFIG, "psm")
+                    oem = _config_option(Config.OCR_CONFIG, "oem")
+                    api = tesserocr.PyTessBaseAPI(
+                        psm=tesserocr.PSM.AUTO if psm is None else psm,
+                        oem=tesserocr.OEM.DEFAULT if oem is None else oem
+                    )
+            except Exception as e:
+                logger.warning(f"tesserocr unavailable ({e}); using the tesseract executable")
+                api = False
+            self._tess_apis[mode] = api
+        
+        return api or None
+    
+    def ocr_image(self, image: Union[Image.Image, np.ndarray], config: str = Config.OCR_CONFIG) -> str:
+        """
+        Run Tesseract OCR on an already preprocessed image.
+        
+        Args:
+            image: Preprocessed PIL Image or grayscale array
+            config: Tesseract configuration (see ocr_config)
+            
+        Returns:
+            Extracted text
+        """
+        api = self._tess_api("ocr")
+        if api is None:
+            return pytesseract.image_to_string(image, config=config)
+        
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        psm = _config_option(config, "psm")
+        with self._tess_lock:
+            if psm is not None:
+                api.SetPageSegMode(psm)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+    
+    def ocr_config(self, binary: np.ndarray) -> str:
+        """
+        Choose the Tesseract configuration for a preprocessed page from its layout.
+        Uniform body text skips Tesseract's layout analysis with PSM 6.
+        
+        Args:
+            binary: Binarized page array (dark text on white)
+            
+        Returns:
+            Tesseract configuration string
+        """
+        if not Config.OCR_LAYOUT_DETECTION:
+            return Config.OCR_CONFIG
+        
+        layout = _page_layout(binary)
+        return {
+            "dense": Config.OCR_CONFIG_DENSE,
+            "mixed": Config.OCR_CONFIG_MIXED,
+            "sparse": Config.OCR_CONFIG_SPARSE
+        }[layout]
+    
+    @property
+    def ocr_dpi(self) -> int:
+        """Resolution PDF pages are rasterized at: the requested DPI, capped at Config.OCR_DPI."""
+        return min(self.dpi, Config.OCR_DPI)
+    
+    @property
+    def in_process_ocr(self) -> bool:
+        """Whether OCR runs in-process through tesserocr."""
+        return self._tess_api("ocr") is not None
+    
+    def _extraction_backends(self) -> Tuple:
+        """
+        Libraries and versions that produce the extracted text, for cache keys.
+        Switching text-layer reader, rasterizer or OCR engine, or upgrading
+        one, changes the output without changing any setting.
+        
+        Returns:
+            Tuple of (component, backend, version) triples
+        """
+        self._check_tesseract()
+        if fitz is not None and Config.PDF_RASTER_BACKEND == "pymupdf":
+            raster = ("pymupdf", _package_version("PyMuPDF"))
+        else:
+            raster = ("pdf2image", _package_version("pdf2image"))
+        # tesserocr falls back to the executable when its engine cannot start
+        if self.in_process_ocr:
+            engine = ("tesserocr", f"{_package_version('tesserocr')} {tesserocr.tesseract_version()}")
+        else:
+            engine = ("tesseract", self._tesseract_version)
+        return (
+            ("text_layer", "pypdfium2", _package_version("pypdfium2")) if pdfium is not None
+            else ("text_layer", "PyPDF2", _package_version("PyPDF2")),
+            ("raster", *raster),
+            ("ocr", *engine),
+        )
+    
     # ==================== Rotation Detection ====================
     
     def detect_rotation(self, image: Image.Image) -> int:
@@ -51,59 +270,114 @@ class AdvancedDocumentProcessor:
         Returns:
             Rotation angle (0, 90, 180, or 270 degrees)
         """
+        # Orientation does not need full resolution
+        small = self._downscale(image, Config.OSD_MAX_SIDE)
+        
         try:
-            # Use Tesseract's Orientation and Script Detection (OSD)
-            osd = pytesseract.image_to_osd(image)
-            
-            # Parse rotation angle from OSD output
-            rotation_line = [line for line in osd.split('\n') if 'Rotate' in line][0]
-            rotation = int(rotation_line.split(':')[1].strip())
+            rotation, _ = self._osd(small)
             
             logger.debug(f"Detected rotation: {rotation} degrees")
             return rotation
             
         except Exception as e:
             logger.debug(f"OSD rotation detection failed, using fallback: {e}")
-            return self._detect_rotation_fallback(image)
+            return self._detect_rotation_fallback(small)
+    
+    @staticmethod
+    def _downscale(image: Image.Image, max_side: int) -> Image.Image:
+        """
+        Shrink an image so its long edge is at most max_side pixels.
+        
+        Args:
+            image: PIL Image object
+            max_side: Maximum length of the long edge
+            
+        Returns:
+            Downscaled PIL Image (the original if already small enough)
+        """
+        scale = max_side / max(image.size)
+        if scale >= 1:
+            return image
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(size, Image.BILINEAR)
+    
+    @staticmethod
+    def _downscale_array(img_cv: np.ndarray, max_side: int) -> np.ndarray:
+        """
+        Shrink an image array so its long edge is at most max_side pixels.
+        
+        Args:
+            img_cv: Image array
+            max_side: Maximum length of the long edge
+            
+        Returns:
+            Downscaled array (the original if already small enough)
+        """
+        scale = max_side / max(img_cv.shape[:2])
+        if scale >= 1:
+            return img_cv
+        height, width = img_cv.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(img_cv, size, interpolation=cv2.INTER_AREA)
+    
+    def _osd(self, image: Image.Image) -> Tuple[int, float]:
+        """
+        Run Tesseract's Orientation and Script Detection (OSD) on an image.
+        
+        Args:
+            image: PIL Image object
+            
+        Returns:
+            Tuple of (rotation angle, orientation confidence)
+        """
+        api = self._tess_api("osd")
+        if api is not None:
+            with self._tess_lock:
+                api.SetImage(image)
+                osd = api.DetectOrientationScript()
+            if not osd:
+                raise RuntimeError("tesserocr orientation detection failed")
+            # orient_deg is the current orientation; Rotate is the correction for it
+            return (360 - osd["orient_deg"]) % 360, float(osd["orient_conf"])
+        
+        osd = pytesseract.image_to_osd(image)
+        
+        # Parse rotation angle and confidence from OSD output
+        fields = dict(line.split(':', 1) for line in osd.split('\n') if ':' in line)
+        rotation = int(fields['Rotate'].strip())
+        confidence = float(fields.get('Orientation confidence', '0').strip())
+        return rotation, confidence
     
     def _detect_rotation_fallback(self, image: Image.Image) -> int:
         """
-        Fallback rotation detection using edge detection and Hough transform.
+        Fallback rotation detection from the shape of text-line blobs.
+        Nearby glyphs are merged into blobs; text lines are wider than tall
+        when upright and taller than wide when the page is on its side.
         
         Args:
             image: PIL Image object
             
         Returns:
-            Best guess rotation angle (0, 90, 180, or 270)
+            Best guess rotation angle (0 or 90)
         """
         try:
-            # Convert to OpenCV format
-            img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
-            
-            # Apply edge detection
-            edges = cv2.Canny(img_cv, 50, 150, apertureSize=3)
-            
-            # Detect lines using Hough transform
-            lines = cv2.HoughLines(edges, 1, np.pi / 180, 200)
-            
-            if lines is not None:
-                # Analyze line angles to determine predominant orientation
-                angles = []
-                for line in lines[:50]:  # Analyze top 50 lines
-                    rho, theta = line[0]
-                    angle = np.degrees(theta)
-                    angles.append(angle)
-                
-                # Find most common orientation
-                avg_angle = np.median(angles)
-                
-                # Map to nearest 90-degree rotation
-                if 45 <= avg_angle < 135:
-                    return 90
-                elif 135 <= avg_angle < 180 or 0 <= avg_angle < 45:
-                    return 0
-                else:
-                    return 270
+            img_cv = np.array(image.convert('L'))
+            
+            # Ink mask, with glyphs merged into word and line blobs
+            mask = cv2.threshold(img_cv, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+            size = max(3, min(img_cv.shape) // 250) | 1
+            mask = cv2.dilate(mask, np.ones((size, size), np.uint8))
+            
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+            widths = stats[1:, cv2.CC_STAT_WIDTH]
+            heights = stats[1:, cv2.CC_STAT_HEIGHT]
+            areas = stats[1:, cv2.CC_STAT_AREA]
+            
+            if count > 1:
+                # Area-weighted vote between horizontal and vertical blobs
+                horizontal = areas[widths > heights].sum()
+                vertical = areas[heights > widths].sum()
+                return 90 if vertical > horizontal else 0
             
         except Exception as e:
             logger.debug(f"Fallback rotation detection failed: {e}")
@@ -129,168 +403,481 @@ class AdvancedDocumentProcessor:
         logger.debug(f"Corrected rotation by {-rotation} degrees")
         return corrected
     
+    def _correct_rotation_array(self, img_cv: np.ndarray, rotation: int) -> np.ndarray:
+        """Array counterpart of correct_rotation, using lossless quarter turns."""
+        rotation %= 360
+        if rotation == 0:
+            return img_cv
+        code = _CV2_ROTATIONS.get(rotation)
+        if code is None:
+            return np.asarray(self.correct_rotation(Image.fromarray(img_cv), rotation))
+        return cv2.rotate(img_cv, getattr(cv2, code))
+    
     # ==================== Image Preprocessing ====================
     
-    def preprocess_image(self, image: Image.Image) -> Image.Image:
+    def _preprocess_array(self, img_cv: np.ndarray) -> np.ndarray:
         """
-        Preprocess image for better OCR results.
-        Applies denoising and adaptive thresholding.
+        Preprocess a grayscale image array for better OCR results.
+        Applies denoising (see denoise) and adaptive thresholding.
         
         Args:
-            image: PIL Image object
+            img_cv: Grayscale image array
             
         Returns:
-            Preprocessed PIL Image
+            Binarized image array
         """
-        # Convert to grayscale
-        image = image.convert('L')
-        
-        # Convert to OpenCV format
-        img_cv = np.array(image)
-        
         # Apply denoising
-        img_cv = cv2.fastNlMeansDenoising(img_cv, None, 10, 7, 21)
+        img_cv = self.denoise(img_cv)
         
-        # Apply adaptive thresholding for better contrast
-        img_cv = cv2.adaptiveThreshold(
-            img_cv, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+        # Apply adaptive thresholding for better contrast (box-filter mean, cheaper than Gaussian weights)
+        return cv2.adaptiveThreshold(
+            img_cv, 255, cv2.ADAPTIVE_THRESH_MEAN_C, 
             cv2.THRESH_BINARY, 11, 2
         )
+    
+    def denoise(self, img_cv: np.ndarray, strength: str = Config.DENOISE_STRENGTH) -> np.ndarray:
+        """
+        Denoise a grayscale image, skipping clean scans.
+        
+        Args:
+            img_cv: Grayscale image array
+            strength: "none", "median" (3x3 median blur) or "nlm" (non-local means)
+            
+        Returns:
+            Denoised image array
+        """
+        if strength == "none":
+            return img_cv
+        
+        median = cv2.medianBlur(img_cv, 3)
+        
+        # Estimate noise from the median residual on background pixels away from text
+        background = (cv2.erode(median, np.ones((5, 5), np.uint8)) > 128).astype(np.uint8)
+        noise = cv2.mean(cv2.absdiff(img_cv, median), mask=background)[0]
+        if noise < Config.DENOISE_MIN_NOISE:
+            logger.debug(f"Skipping denoising of clean scan (noise {noise:.2f})")
+            return img_cv
         
-        # Convert back to PIL
-        return Image.fromarray(img_cv)
+        if strength != "nlm":
+            return median
+        
+        if _cuda_available():
+            gpu = cv2.cuda_GpuMat()
+            gpu.upload(img_cv)
+            return cv2.cuda.fastNlMeansDenoising(gpu, 10, search_window=21, block_size=7).download()
+        return cv2.fastNlMeansDenoising(img_cv, None, 10, 7, 21)
     
     # ==================== OCR Text Extraction ====================
     
-    def extract_text_from_image(self, image: Image.Image, page_num: Optional[int] = None) -> str:
+    def prepare_array(
+        self,
+        img_cv: np.ndarray,
+        page_num: Optional[int] = None,
+        rotation_hint: Optional[int] = None
+    ) -> np.ndarray:
         """
-        Extract text from a single image using Tesseract OCR with preprocessing.
+        Correct rotation and preprocess a grayscale page array for OCR.
+        The page stays a numpy array throughout; only the small OSD copy
+        is converted to PIL.
         
         Args:
-            image: PIL Image object
+            img_cv: Grayscale image array
             page_num: Page number for logging purposes
+            rotation_hint: Known rotation of the image; skips OSD detection when given
             
         Returns:
-            Extracted text
+            Binarized image array
         """
         page_info = f"page {page_num}" if page_num else "image"
         
         # Detect and correct rotation
-        rotation = self.detect_rotation(image)
+        if rotation_hint is None:
+            small = self._downscale_array(img_cv, Config.OSD_MAX_SIDE)
+            rotation = self.detect_rotation(Image.fromarray(small))
+        else:
+            rotation = rotation_hint
         if rotation != 0:
             logger.info(f"Correcting rotation for {page_info}: {rotation} degrees")
-            image = self.correct_rotation(image, rotation)
+            img_cv = self._correct_rotation_array(img_cv, rotation)
+        
+        return self._preprocess_array(img_cv)
+    
+    def extract_text_from_image(
+        self,
+        image: Image.Image,
+        page_num: Optional[int] = None,
+        rotation_hint: Optional[int] = None
+    ) -> str:
+        """
+        Extract text from a single image using Tesseract OCR with preprocessing.
+        
+        Args:
+            image: PIL Image object
+            page_num: Page number for logging purposes
+            rotation_hint: Known rotation of the image; skips OSD detection when given
+            
+        Returns:
+            Extracted text
+        """
+        self._check_tesseract()
+        processed = self.prepare_array(np.asarray(image.convert('L')), page_num, rotation_hint)
         
-        # Preprocess image
-        processed_image = self.preprocess_image(image)
+        # Extract text with the configuration suited to the page layout
+        return self.ocr_image(processed, config=self.ocr_config(processed))
+    
+    def extract_text_from_image_files(
+        self,
+        image_paths: List[str],
+        list_dir: str,
+        config: str = Config.OCR_CONFIG
+    ) -> List[str]:
+        """
+        OCR several preprocessed images in a single Tesseract run.
+        Tesseract reads the images from a list file, so its models load once
+        instead of once per page.
         
-        # Extract text with optimized config
-        text = pytesseract.image_to_string(processed_image, config=Config.OCR_CONFIG)
+        Args:
+            image_paths: Paths of preprocessed images, in page order
+            list_dir: Directory for the image list file
+            config: Tesseract configuration for every image
+            
+        Returns:
+            Extracted text of each image, in the same order
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", dir=list_dir, delete=False) as list_file:
+            list_file.write("\n".join(image_paths) + "\n")
+        
+        try:
+            output = pytesseract.image_to_string(list_file.name, config=config)
+        finally:
+            os.remove(list_file.name)
         
-        return text
+        # Tesseract separates pages with a form feed
+        texts = output.split("\f")
+        if len(texts) == len(image_paths) + 1 and not texts[-1].strip():
+            texts.pop()
+        if len(texts) != len(image_paths):
+            raise ValueError(f"Batch OCR returned {len(texts)} pages for {len(image_paths)} images")
+        return texts
     
     # ==================== PDF Processing ====================
     
-    def extract_text_from_native_pdf(self, file_path: Path) -> Tuple[str, bool]:
+    def _native_page_texts(self, file_path: Path) -> Iterator[str]:
         """
-        Attempt to extract text from PDF using native text extraction.
+        Read the embedded text layer page by page, with PDFium when available.
         
         Args:
             file_path: Path to PDF file
             
-        Returns:
-            Tuple of (extracted_text, success_flag)
+        Yields:
+            Text of each page in page order (empty for pages without text)
         """
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text_parts = []
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        text_parts.append(f"\n{'='*60}\nPAGE {page_num}\n{'='*60}\n\n{page_text}")
-                
-                full_text = "\n\n".join(text_parts)
-                
-                # Check if we got meaningful text (not just whitespace)
-                if full_text.strip() and len(full_text.strip()) > 100:
-                    logger.info("Successfully extracted text using native PDF extraction")
-                    return full_text, True
-                
-        except Exception as e:
-            logger.debug(f"Native PDF extraction failed: {e}")
+        if pdfium is not None:
+            # Read every page before yielding so a PDFium failure can fall back cleanly
+            texts = []
+            try:
+                pdf = pdfium.PdfDocument(str(file_path))
+                try:
+                    for page in pdf:
+                        textpage = page.get_textpage()
+                        texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+                        textpage.close()
+                        page.close()
+                finally:
+                    pdf.close()
+            except Exception as e:
+                logger.warning(f"PDFium text extraction failed, falling back to PyPDF2: {e}")
+            else:
+                yield from texts
+                return
         
-        return "", False
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page in pdf_reader.pages:
+                yield page.extract_text() or ""
+    
+    def _add_native_page(self, builder: _TextBuilder, page_num: int, page_text: str) -> None:
+        """Append a page of native text to the builder."""
+        if builder.char_count:
+            builder.add("\n\n")
+        builder.add(_BANNER_TEMPLATE.format(page_num))
+        builder.add(page_text)
+    
+    def _add_ocr_page(self, builder: _TextBuilder, page_num: int, text: str, error: Optional[str]) -> None:
+        """Append a page of OCR output, or its error marker, to the builder."""
+        # Native pages carry no trailing separator; keep the banner on its own line
+        if builder.char_count and builder.last_char != "\n":
+            builder.add("\n\n")
+        if error is None:
+            builder.add(_BANNER_TEMPLATE.format(page_num))
+            builder.add(text)
+            builder.add("\n\n")
+        else:
+            logger.error(f"Error processing page {page_num}: {error}")
+            builder.failed_pages += 1
+            builder.add(f"\n[ERROR: Could not process page {page_num}]\n\n")
     
-    def extract_text_from_scanned_pdf(self, file_path: Path) -> str:
+    def extract_text_from_scanned_pdf(self, file_path: Path, builder: Optional[_TextBuilder] = None) -> str:
         """
         Extract text from scanned PDF using OCR with rotation correction.
         
         Args:
             file_path: Path to PDF file
+            builder: Text builder to accumulate into
             
         Returns:
             Extracted text from all pages
         """
+        builder = builder if builder is not None else _TextBuilder()
+        
         logger.info(f"Processing scanned PDF with OCR: {file_path.name}")
-        logger.info(f"Converting PDF to images at {self.dpi} DPI...")
+        logger.info(f"Converting PDF to images at {self.ocr_dpi} DPI...")
+        
+        with tempfile.TemporaryDirectory(prefix="suebot_ocr_") as page_dir:
+            tasks = self._page_tasks(file_path, page_dir)
+            logger.info(f"Processing {len(tasks)} pages with OCR...")
+            
+            # Extract text from each page, in page order
+            for i, text, error in self._ocr_pages(tasks, page_dir):
+                self._add_ocr_page(builder, i, text, error)
         
+        full_text = builder.text()
+        logger.info("OCR extraction complete!")
+        return full_text
+    
+    def _page_tasks(self, file_path: Path, page_dir: str, pages: Optional[List[int]] = None) -> List[PageTask]:
+        """
+        Prepare one OCR task per PDF page.
+        PyMuPDF tasks reference the PDF itself and are rendered where they are
+        processed; the pdf2image fallback renders the pages to page_dir first.
+        Each task carries a rotation hint (see _rotation_hints).
+        
+        Args:
+            file_path: Path to PDF file
+            page_dir: Directory for rendered page images
+            pages: Page numbers to OCR (all pages if None)
+            
+        Returns:
+            Page tasks in page order
+        """
+        self._check_tesseract()
         try:
-            # Convert PDF pages to images
-            images = convert_from_path(str(file_path), dpi=self.dpi)
+            if fitz is not None and Config.PDF_RASTER_BACKEND == "pymupdf":
+                if pages is None:
+                    with fitz.open(file_path) as doc:
+                        pages = list(range(1, doc.page_count + 1))
+                tasks = [(str(file_path), page_num, True, None) for page_num in pages]
+            
+            # Render pages to files so workers receive paths, not pickled images
+            elif pages is None:
+                page_paths = pdf2image.convert_from_path(
+                    str(file_path), dpi=self.ocr_dpi, output_folder=page_dir, paths_only=True
+                )
+                tasks = [(path, page_num, False, None) for page_num, path in enumerate(page_paths, 1)]
+            
+            else:
+                tasks = [
+                    (pdf2image.convert_from_path(
+                        str(file_path), dpi=self.ocr_dpi, output_folder=page_dir, paths_only=True,
+                        first_page=page_num, last_page=page_num
+                    )[0], page_num, False, None)
+                    for page_num in pages
+                ]
         except Exception as e:
             logger.error(f"Failed to convert PDF to images: {e}")
             raise ValueError(f"PDF conversion failed: {str(e)}")
         
-        logger.info(f"Processing {len(images)} pages with OCR...")
+        return self._rotation_hints(file_path, tasks)
+    
+    @staticmethod
+    def _pdf_page_rotations(file_path: Path) -> Dict[int, int]:
+        """
+        Read the /Rotate entry of every PDF page.
+        
+        Args:
+            file_path: Path to PDF file
+            
+        Returns:
+            Mapping of page number to declared rotation (empty if unavailable)
+        """
+        try:
+            if fitz is not None:
+                with fitz.open(file_path) as doc:
+                    return {i: page.rotation for i, page in enumerate(doc, 1)}
+            if pdfium is not None:
+                pdf = pdfium.PdfDocument(str(file_path))
+                try:
+                    return {i: pdf[i - 1].get_rotation() for i in range(1, len(pdf) + 1)}
+                finally:
+                    pdf.close()
+        except Exception as e:
+            logger.debug(f"Could not read page rotation from PDF: {e}")
+        return {}
+    
+    def _rotation_hints(self, file_path: Path, tasks: List[PageTask]) -> List[PageTask]:
+        """
+        Attach rotation hints to page tasks so OCR can skip per-page OSD.
+        Pages with a /Rotate entry are rendered upright already; for the rest,
+        OSD runs once on the first page and its result is assumed for the
+        whole document unless its confidence is low.
+        
+        Args:
+            file_path: Path to PDF file
+            tasks: Page tasks without hints
+            
+        Returns:
+            Page tasks with rotation hints (None means detect per page)
+        """
+        rotations = self._pdf_page_rotations(file_path)
+        document_hint = None
+        probed = not Config.OSD_ONCE_PER_DOCUMENT
+        
+        hinted = []
+        for path, page_num, from_pdf, _ in tasks:
+            if rotations.get(page_num, 0):
+                hint = 0  # Renderers apply /Rotate, so the page image is upright
+            else:
+                if not probed:
+                    probed = True
+                    document_hint = self._probe_rotation((path, page_num, from_pdf, None))
+                hint = document_hint
+            hinted.append((path, page_num, from_pdf, hint))
+        return hinted
+    
+    def _probe_rotation(self, task: PageTask) -> Optional[int]:
+        """
+        Run OSD on one page to estimate the rotation of the whole document.
+        
+        Args:
+            task: Page task to probe
+            
+        Returns:
+            Detected rotation, or None if OSD failed or was not confident
+        """
+        documents = {}
+        try:
+            image = _load_page_array(task, self.ocr_dpi, documents)
+            rotation, confidence = self._osd(Image.fromarray(self._downscale_array(image, Config.OSD_MAX_SIDE)))
+        except Exception as e:
+            logger.debug(f"Document rotation probe failed: {e}")
+            return None
+        finally:
+            for doc in documents.values():
+                doc.close()
+        
+        if confidence < Config.OSD_MIN_CONFIDENCE:
+            logger.debug(f"Low OSD confidence on page {task[1]} ({confidence:.2f}); detecting per page")
+            return None
+        
+        logger.info(f"Detected document rotation from page {task[1]}: {rotation} degrees")
+        return rotation
+    
+    def _ocr_pages(self, tasks: List[PageTask], page_dir: str) -> Iterator[PageResult]:
+        """
+        OCR pages in batches, one per process when running in parallel.
         
-        # Extract text from each page
-        all_text = []
-        for i, image in enumerate(images, 1):
-            logger.info(f"OCR processing page {i}/{len(images)}...")
+        Args:
+            tasks: Page tasks in page order
+            page_dir: Directory for preprocessed page images
             
+        Yields:
+            Tuples of (page_number, text, error) in page order; error is None on success
+        """
+        workers = min(Config.OCR_WORKERS, len(tasks))
+        
+        if workers <= 1:
+            documents = {}
             try:
-                text = self.extract_text_from_image(image, page_num=i)
-                all_text.append(f"{'='*60}\n")
-                all_text.append(f"PAGE {i}\n")
-                all_text.append(f"{'='*60}\n\n")
-                all_text.append(text)
-                all_text.append(f"\n\n")
-            except Exception as e:
-                logger.error(f"Error processing page {i}: {e}")
-                all_text.append(f"\n[ERROR: Could not process page {i}]\n\n")
+                yield from _ocr_batch(self, tasks, page_dir, documents)
+            finally:
+                for doc in documents.values():
+                    doc.close()
+            return
         
-        full_text = ''.join(all_text)
-        logger.info("OCR extraction complete!")
-        return full_text
+        # Contiguous shards keep results in page order
+        size = -(-len(tasks) // workers)
+        shards = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+        
+        logger.info(f"OCR processing {len(tasks)} pages on {len(shards)} processes...")
+        # Spawned workers start clean, without the parent's gRPC or Streamlit threads
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_ocr_worker,
+            initargs=(pytesseract.pytesseract.tesseract_cmd, self.dpi)
+        ) as executor:
+            futures = [executor.submit(_ocr_shard, shard, page_dir) for shard in shards]
+            for shard, future in zip(shards, futures):
+                try:
+                    yield from future.result()
+                except Exception as e:
+                    for task in shard:
+                        yield task[1], "", str(e)
     
-    def extract_text_from_pdf(self, file_path: Path) -> str:
+    def extract_text_from_pdf(self, file_path: Path, builder: Optional[_TextBuilder] = None) -> str:
         """
         Intelligent PDF text extraction - tries native first, falls back to OCR.
+        Pages with fewer than NATIVE_TEXT_MIN_CHARS characters of embedded text are OCRed individually.
         
         Args:
             file_path: Path to PDF file
+            builder: Text builder to accumulate into
             
         Returns:
             Extracted text
         """
-        # Try native text extraction first
-        text, success = self.extract_text_from_native_pdf(file_path)
+        builder = builder if builder is not None else _TextBuilder()
         
-        if success:
-            return text
+        # Try native text extraction first. Every page is read even when the opening
+        # pages are scans: the text layer is cheap next to OCR, and leading exhibits
+        # or cover letters are often followed by digitally-born pages.
+        page_texts: List[str] = []
+        try:
+            page_texts = list(self._native_page_texts(file_path))
+        except Exception as e:
+            logger.debug(f"Native PDF extraction failed: {e}")
+            page_texts = []
+        
+        # Too little embedded text overall means a scanned document: OCR every page
+        if sum(len(page_text.strip()) for page_text in page_texts) <= 100:
+            logger.info("Native extraction insufficient, using OCR...")
+            return self.extract_text_from_scanned_pdf(file_path, builder)
         
-        # Fall back to OCR for scanned PDFs
-        logger.info("Native extraction insufficient, using OCR...")
-        return self.extract_text_from_scanned_pdf(file_path)
+        # Pages with only a stray header or Bates stamp in their text layer are scans too
+        blank_pages = [page_num for page_num, page_text in enumerate(page_texts, 1) if not _has_text_layer(page_text)]
+        if not blank_pages:
+            for page_num, page_text in enumerate(page_texts, 1):
+                self._add_native_page(builder, page_num, page_text)
+            logger.info("Successfully extracted text using native PDF extraction")
+            return builder.text()
+        
+        # Hybrid: keep the text layer where it exists and OCR only the blank pages
+        logger.info(f"OCR for {len(blank_pages)} of {len(page_texts)} pages with little or no embedded text...")
+        with tempfile.TemporaryDirectory(prefix="suebot_ocr_") as page_dir:
+            tasks = self._page_tasks(file_path, page_dir, pages=blank_pages)
+            ocr_results = {page_num: (text, error) for page_num, text, error in self._ocr_pages(tasks, page_dir)}
+        
+        for page_num, page_text in enumerate(page_texts, 1):
+            text, error = ocr_results.get(page_num, (None, None))
+            if error is not None and page_text.strip():
+                # Keep what little text layer a page has if its OCR failed
+                logger.error(f"Error processing page {page_num}: {error}")
+                builder.failed_pages += 1
+                self._add_native_page(builder, page_num, page_text)
+            elif text is not None:
+                self._add_ocr_page(builder, page_num, text, error)
+            else:
+                self._add_native_page(builder, page_num, page_text)
+        
+        return builder.text()
     
-    def extract_text_from_image_file(self, file_path: Path) -> str:
+    def extract_text_from_image_file(self, file_path: Path, builder: Optional[_TextBuilder] = None) -> str:
         """
         Extract text from image file (PNG, JPG, TIFF, etc.).
         
         Args:
             file_path: Path to image file
+            builder: Text builder to accumulate into
             
         Returns:
             Extracted text
@@ -298,12 +885,31 @@ class AdvancedDocumentProcessor:
         try:
             image = Image.open(file_path)
             text = self.extract_text_from_image(image)
+            if builder is not None:
+                builder.add(text)
             return text
         except Exception as e:
             raise ValueError(f"Error processing image: {str(e)}")
     
     # ==================== Main Processing Interface ====================
     
+    @staticmethod
+    def _file_digest(path: Path) -> str:
+        """
+        Hash file contents in 1 MiB blocks (BLAKE3, or BLAKE2b if unavailable).
+        
+        Args:
+            path: File to hash
+            
+        Returns:
+            Hex digest of the file contents
+        """
+        digest = blake3.blake3() if blake3 is not None else hashlib.blake2b()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
     def process_document(self, file_path: str) -> Tuple[str, Dict]:
         """
         Process a document and return extracted text and metadata.
@@ -324,14 +930,29 @@ class AdvancedDocumentProcessor:
         if size_mb > Config.MAX_DOCUMENT_SIZE_MB:
             raise ValueError(f"Document exceeds {Config.MAX_DOCUMENT_SIZE_MB}MB limit")
         
+        # Reuse the extraction of identical content processed with the same settings.
+        # Document text is only written to disk when explicitly enabled.
+        cache = get_disk_cache() if Config.DOCUMENT_CACHE_ENABLED else None
+        key = None
+        if cache is not None:
+            key = ("document", self._file_digest(path), self.ocr_dpi, _ocr_settings(),
+                   self._extraction_backends())
+            cached = cache.get(key)
+            if cached is not None:
+                logger.info(f"Reusing extracted text for {path.name} from cache")
+                text, metadata = cached
+                return text, {**metadata, "filename": path.name}
+        
         # Extract text based on file type
         suffix = path.suffix.lower()
         logger.info(f"Processing {suffix} file: {path.name}")
         
+        # Character and word counts accumulate page by page during extraction
+        builder = _TextBuilder()
         if suffix == '.pdf':
-            text = self.extract_text_from_pdf(path)
+            text = self.extract_text_from_pdf(path, builder)
         elif suffix in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-            text = self.extract_text_from_image_file(path)
+            text = self.extract_text_from_image_file(path, builder)
         else:
             raise ValueError(f"Unsupported format: {suffix}. Supported: {Config.SUPPORTED_FORMATS}")
         
@@ -339,11 +960,238 @@ class AdvancedDocumentProcessor:
             "filename": path.name,
             "file_type": suffix,
             "size_mb": round(size_mb, 2),
-            "char_count": len(text),
-            "word_count": len(text.split()),
-            "dpi_used": self.dpi if suffix == '.pdf' else 'N/A'
+            "char_count": builder.char_count,
+            "word_count": builder.word_count,
+            "dpi_used": self.ocr_dpi if suffix == '.pdf' else 'N/A'
         }
         
         logger.info(f"Extraction complete: {metadata['word_count']} words extracted")
         
+        # Failures such as a missing tesseract or a crashed worker may be transient
+        if key is not None and builder.failed_pages:
+            logger.warning(f"Not caching {path.name}: OCR failed on {builder.failed_pages} page(s)")
+        elif key is not None:
+            cache.set(key, (text, metadata), expire=Config.CACHE_TTL_SECONDS)
+        
         return text, metadata
+
+
+def _config_option(config: str, name: str) -> Optional[int]:
+    """Read a numeric option such as --psm from a Tesseract configuration string."""
+    match = re.search(rf"--{name} (\d+)", config)
+    return int(match.group(1)) if match else None
+
+
+def _ocr_settings() -> Tuple:
+    """
+    Extraction settings that change extracted text, for cache keys.
+    Every Config attribute with an extraction prefix is included, so new
+    settings cannot be left out of the key.
+    
+    Returns:
+        Sorted tuple of (name, value) pairs
+    """
+    return tuple(sorted(
+        (name, value) for name, value in vars(Config).items()
+        if name.startswith(_TEXT_SETTING_PREFIXES) and name not in _NON_TEXT_SETTINGS
+    ))
+
+
+def _has_text_layer(page_text: str) -> bool:
+    """Whether a page's embedded text is substantial enough to skip OCR."""
+    return len(page_text.strip()) >= Config.NATIVE_TEXT_MIN_CHARS
+
+
+def _page_layout(binary: np.ndarray) -> str:
+    """
+    Classify a binarized page as "dense" body text, a "mixed" multi-column
+    layout or "sparse" scattered text from its row and column ink profiles.
+    
+    Args:
+        binary: Binarized page array (dark text on white)
+        
+    Returns:
+        "dense", "mixed" or "sparse"
+    """
+    ink = binary < 128
+    height, width = ink.shape
+    
+    # Rows and columns with more than a speck of ink
+    rows = ink.sum(axis=1) >= max(2, width // 200)
+    if not rows.any():
+        return "dense"
+    top, bottom = int(np.argmax(rows)), height - int(np.argmax(rows[::-1]))
+    cols = ink[top:bottom].sum(axis=0) >= max(2, (bottom - top) // 200)
+    left, right = int(np.argmax(cols)), width - int(np.argmax(cols[::-1]))
+    
+    # Body text fills most rows of its block; forms leave wide gaps between fields
+    if rows[top:bottom].mean() < Config.OCR_SPARSE_ROW_COVERAGE:
+        return "sparse"
+    
+    # A long run of blank columns inside the block is a gutter between columns
+    blank = np.concatenate(([0], (~cols[left:right]).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(blank))
+    gutter = (edges[1::2] - edges[::2]).max(initial=0) / max(1, right - left)
+    return "mixed" if gutter >= Config.OCR_MIN_GUTTER else "dense"
+
+
+@lru_cache(maxsize=None)
+def _package_version(distribution: str) -> Optional[str]:
+    """Installed version of a distribution, or None if it has no metadata."""
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    """Whether OpenCV was built with CUDA and a GPU is present."""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        return False
+
+
+# ==================== Parallel OCR Workers ====================
+
+_worker_processor: Optional[AdvancedDocumentProcessor] = None
+_worker_documents: Dict[str, "fitz.Document"] = {}
+
+
+def _init_ocr_worker(tesseract_cmd: str, dpi: int) -> None:
+    """Create the per-process document processor used by _ocr_shard."""
+    global _worker_processor
+    # Tesseract's OpenMP pool defaults to one thread per core, so N workers would
+    # oversubscribe the CPU N x N; pin it to one thread per worker. Set before
+    # tesserocr loads, and inherited by pytesseract's tesseract subprocesses
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    _worker_processor = AdvancedDocumentProcessor(tesseract_path=tesseract_cmd, dpi=dpi)
+
+
+def _load_page_array(task: PageTask, dpi: int, documents: Dict[str, "fitz.Document"]) -> np.ndarray:
+    """
+    Load a page task as a grayscale array, rendering PDF pages with PyMuPDF.
+    
+    Args:
+        task: Page task
+        dpi: Rendering resolution for PDF pages
+        documents: Open PDF documents by path, reused across pages
+        
+    Returns:
+        Grayscale uint8 array of the page
+    """
+    path, page_num, from_pdf, _ = task
+    if not from_pdf:
+        img_cv = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img_cv is None:
+            raise ValueError(f"Could not read page image: {path}")
+        return img_cv
+    
+    doc = documents.get(path)
+    if doc is None:
+        doc = documents[path] = fitz.open(path)
+    
+    # Render straight to grayscale and wrap the samples without a PIL image
+    pix = doc[page_num - 1].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    img_cv = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    del pix  # Release the raw bitmap before the next page is rendered
+    return img_cv
+
+
+def _iter_prepared_pages(
+    processor: AdvancedDocumentProcessor,
+    tasks: List[PageTask],
+    documents: Dict[str, "fitz.Document"]
+) -> Iterator[Tuple[PageTask, Optional[np.ndarray], Optional[Exception]]]:
+    """
+    Render and preprocess page tasks one at a time, so only one page raster
+    is alive at once however long the document is.
+    
+    Args:
+        processor: Processor providing rotation detection and preprocessing
+        tasks: Page tasks in page order
+        documents: Open PDF documents by path, reused across pages
+        
+    Yields:
+        Tuples of (task, binarized page array, error); the array is None on error
+    """
+    for task in tasks:
+        try:
+            # The render is passed straight through, so prepare_array holds its only
+            # reference and frees it as soon as the page is binarized
+            processed = processor.prepare_array(
+                _load_page_array(task, processor.ocr_dpi, documents),
+                page_num=task[1], rotation_hint=task[3]
+            )
+        except Exception as e:
+            yield task, None, e
+            continue
+        
+        yield task, processed, None
+        del processed
+
+
+def _ocr_batch(
+    processor: AdvancedDocumentProcessor,
+    tasks: List[PageTask],
+    page_dir: str,
+    documents: Dict[str, "fitz.Document"]
+) -> List[PageResult]:
+    """
+    Preprocess page tasks to PNG files and OCR them in one Tesseract run,
+    capturing errors per page instead of raising. With tesserocr the pages
+    are OCR'd in-process as they are prepared instead.
+    
+    Args:
+        processor: Processor providing rotation detection and preprocessing
+        tasks: Page tasks in page order
+        page_dir: Directory for preprocessed page images
+        documents: Open PDF documents by path, reused across pages
+        
+    Returns:
+        List of (page_number, text, error) in page order
+    """
+    results: Dict[int, PageResult] = {}
+    # Preprocessed page files grouped by Tesseract configuration, one run per group
+    prepared: Dict[str, List[Tuple[int, str]]] = {}
+    
+    # Counted by hand: enumerate reuses its result tuple, which would keep the
+    # previous page array alive while the generator renders the next one
+    n = 0
+    for task, processed, error in _iter_prepared_pages(processor, tasks, documents):
+        n += 1
+        page_num = task[1]
+        logger.info(f"Prepared page {page_num} for OCR ({n}/{len(tasks)})")
+        try:
+            if error is not None:
+                raise error
+            config = processor.ocr_config(processed)
+            if processor.in_process_ocr:
+                results[page_num] = (page_num, processor.ocr_image(processed, config=config), None)
+                continue
+            image_path = os.path.join(page_dir, f"ocr-{page_num:05d}.png")
+            if not cv2.imwrite(image_path, processed):
+                raise ValueError(f"Could not write preprocessed page: {image_path}")
+            prepared.setdefault(config, []).append((page_num, image_path))
+        except Exception as e:
+            results[page_num] = (page_num, "", str(e))
+        finally:
+            # Drop this page before the generator renders the next one
+            del processed
+    
+    for config, pages in prepared.items():
+        try:
+            texts = processor.extract_text_from_image_files([path for _, path in pages], page_dir, config=config)
+            for (page_num, _), text in zip(pages, texts):
+                results[page_num] = (page_num, text, None)
+        except Exception as e:
+            for page_num, _ in pages:
+                results[page_num] = (page_num, "", str(e))
+    
+    return [results[task[1]] for task in tasks]
+
+
+def _ocr_shard(tasks: List[PageTask], page_dir: str) -> List[PageResult]:
+    """Process pool entry point: OCR a shard of page tasks in a worker."""
+    return _ocr_batch(_worker_processor, tasks, page_dir, _worker_documents)
@@ -0,0 +1,138 @@
+from legal_chatbot.config import Config, logger
+from typing import Optional
+import re
+try:
+    from rank_bm25 import BM25Okapi
+except ImportError:
+    BM25Okapi = None
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_PAGE_PATTERN = re.compile(r"^PAGE (\d+)$")
+_PAGE_LINE_PATTERN = re.compile(r"^PAGE (\d+)$", re.MULTILINE)
+
+# ==================== Chunking ====================
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens used for BM25 indexing and querying."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def split_pinned(text: str, limit: int) -> tuple[str, str, Optional[int]]:
+    """
+    Split a document into a head that is pinned in the conversation and the rest.
+    The split falls on a line boundary so no line is cut in half.
+    
+    Args:
+        text: Full document text with PAGE markers
+        limit: Maximum number of characters in the pinned head
+    
+    Returns:
+        Tuple of (head, remainder, page the remainder starts on)
+    """
+    if len(text) <= limit:
+        return text, "", None
+    
+    cut = text.rfind("\n", 0, limit)
+    if cut <= 0:
+        cut = limit
+    head, remainder = text[:cut], text[cut:]
+    
+    pages = [match.group(1) for match in _PAGE_LINE_PATTERN.finditer(head)]
+    return head, remainder, int(pages[-1]) if pages else None
+
+
+def chunk_document(text: str, chunk_words: int = Config.CHUNK_WORDS, start_page: Optional[int] = None) -> list[str]:
+    """
+    Split document text into line-aligned chunks of roughly chunk_words words.
+    Each chunk is labelled with the page it starts on so answers can cite it.
+    
+    Args:
+        text: Document text with PAGE markers
+        chunk_words: Target number of words per chunk
+        start_page: Page the text starts on, if it begins mid-document
+    
+    Returns:
+        List of chunk strings in document order
+    """
+    chunks = []
+    lines: list[str] = []
+    words = 0
+    page = start_page
+    chunk_page = None
+    
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            label = f"[Page {chunk_page}]\n" if chunk_page else ""
+            chunks.append(label + body)
+    
+    for line in text.splitlines():
+        stripped = line.strip()
+        match = _PAGE_PATTERN.match(stripped)
+        if match:
+            page = int(match.group(1))
+            continue
+        if not stripped or set(stripped) == {"="}:
+            continue
+        
+        if not lines:
+            chunk_page = page
+        lines.append(line)
+        words += len(stripped.split())
+        
+        if words >= chunk_words:
+            flush()
+            lines, words = [], 0
+    
+    flush()
+    return chunks
+
+
+# ==================== BM25 Retrieval ====================
+
+def build_bm25_index(chunks: list[str]) -> Optional["BM25Okapi"]:
+    """
+    Build a BM25 index over document chunks.
+    
+    Args:
+        chunks: Chunks produced by chunk_document
+    
+    Returns:
+        BM25Okapi index, or None if rank_bm25 is unavailable or there are no chunks
+    """
+    if BM25Okapi is None:
+        logger.info("rank_bm25 not installed; document excerpts fall back to the opening pages")
+        return None
+    if not chunks:
+        return None
+    return BM25Okapi([tokenize(chunk) for chunk in chunks])
+
+
+def retrieve_chunks(bm25: Optional["BM25Okapi"], chunks: list[str], query: str, limit: int) -> list[str]:
+    """
+    Select the chunks most relevant to a query within a character budget.
+    
+    Args:
+        bm25: Index built by build_bm25_index (None falls back to document order)
+        chunks: Chunks the index was built from
+        query: User query text
+        limit: Maximum total characters of the selected chunks
+    
+    Returns:
+        Selected chunks, in document order
+    """
+    order = list(range(len(chunks)))
+    if bm25 is not None:
+        scores = bm25.get_scores(tokenize(query))
+        if scores.max(initial=0.0) > 0:
+            order.sort(key=lambda i: scores[i], reverse=True)
+    
+    selected = []
+    used = 0
+    for i in order[:Config.RETRIEVAL_TOP_K]:
+        if used + len(chunks[i]) > limit and selected:
+            break
+        selected.append(i)
+        used += len(chunks[i])
+    
+    return [chunks[i] for i in sorted(selected)]
@@ -0,0 +1,85 @@
+from legal_chatbot.config import Config, logger
+from functools import lru_cache
+from typing import Optional, Sequence
+import numpy as np
+
+# ==================== Local Sentence Embeddings ====================
+
+@lru_cache(maxsize=1)
+def get_embedding_model():
+    """
+    Load the local sentence-embedding model once per process.
+    Prefers the int8-quantized ONNX export and falls back to the PyTorch weights.
+    
+    Returns:
+        SentenceTransformer instance, or None if sentence-transformers is unavailable
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.info("sentence-transformers not installed; semantic matching disabled")
+        return None
+    
+    if Config.EMBEDDING_BACKEND == "onnx":
+        try:
+            model = SentenceTransformer(
+                Config.EMBEDDING_MODEL,
+                backend="onnx",
+                model_kwargs={"file_name": Config.EMBEDDING_ONNX_FILE}
+            )
+            logger.info(f"Loaded embedding model: {Config.EMBEDDING_MODEL} ({Config.EMBEDDING_ONNX_FILE})")
+            return model
+        except Exception as e:
+            logger.info(f"Quantized ONNX embeddings unavailable ({e}); using PyTorch weights")
+    
+    try:
+        model = SentenceTransformer(Config.EMBEDDING_MODEL)
+        logger.info(f"Loaded embedding model: {Config.EMBEDDING_MODEL}")
+        return model
+    except Exception as e:
+        logger.warning(f"Could not load embedding model {Config.EMBEDDING_MODEL}: {e}")
+        return None
+
+
+def embed_texts(texts: Sequence[str]) -> Optional[np.ndarray]:
+    """
+    Embed texts into L2-normalized vectors so a dot product is cosine similarity.
+    
+    Args:
+        texts: Texts to embed
+    
+    Returns:
+        Float32 array of shape (len(texts), dim), or None if no model is available
+    """
+    model = get_embedding_model()
+    if model is None:
+        return None
+    
+    embeddings = model.encode(
+        list(texts),
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    return embeddings.astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=Config.EMBEDDING_MEMO_SIZE)
+def embed_text(text: str) -> Optional[np.ndarray]:
+    """
+    Embed a single text, memoized so the classifier and the semantic cache
+    share one forward pass per query.
+    
+    Args:
+        text: Text to embed
+    
+    Returns:
+        Read-only float32 vector of shape (dim,), or None if no model is available
+    """
+    embeddings = embed_texts([text])
+    if embeddings is None:
+        return None
+    
+    vector = embeddings[0]
+    vector.flags.writeable = False
+    return vector
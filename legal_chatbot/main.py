@@ -1,4 +1,3 @@
-from legal_chatbot.chatbot.chatbot import LegalChatbot
 from legal_chatbot.config import Config
 import argparse
 
@@ -27,6 +26,13 @@ def main():
     
     args = parser.parse_args()
     
+    # Imported after argument parsing so --help does not load the LLM and OCR stack
+    from legal_chatbot.chatbot.chatbot import LegalChatbot
+    from legal_chatbot.agents.classifier import warm_up_agents
+    
+    # Connect to Gemini in the background while the chatbot and document load
+    warm_up_agents()
+    
     # Initialize chatbot
     chatbot = LegalChatbot(
         tesseract_path=args.tesseract_path,
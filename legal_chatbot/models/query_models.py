@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Annotated, Optional
+from typing import Annotated, Any, Optional
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
 from enum import Enum
@@ -34,14 +34,51 @@ class QueryClassifier(BaseModel):
     )
 
 
+class FullReport(BaseModel):
+    """Combined analysis produced by a single batched LLM call."""
+    
+    summary: str = Field(
+        description="Comprehensive legal summary of the document"
+    )
+    fdcpa_findings: str = Field(
+        description="FDCPA compliance findings with cited sections"
+    )
+    tcpa_findings: str = Field(
+        description="TCPA compliance findings with cited sections"
+    )
+    risk_assessment: str = Field(
+        description="Prioritized legal risks with severity and mitigations"
+    )
+
+
 # ==================== State Management ====================
 
+# Id of the system message that pins the loaded document at the start of the conversation
+DOCUMENT_MESSAGE_ID = "document"
+
+
+class LoadedDocument:
+    """
+    Text and retrieval index of a loaded document.
+    Kept out of the graph state, which only carries its document_id.
+    """
+    
+    __slots__ = ("content", "chunks", "bm25", "digest", "__weakref__")
+    
+    def __init__(self, content: str, chunks: list[str], bm25: Optional[Any], digest: str):
+        self.content = content
+        self.chunks = chunks
+        self.bm25 = bm25  # BM25Okapi index over chunks
+        self.digest = digest  # Hash of the full content, scoping cached responses
+
+
 class LegalChatState(TypedDict):
     """Enhanced state for legal document review chatbot."""
     
     messages: Annotated[list, add_messages]
     query_type: Optional[str]
-    document_content: Optional[str]
+    document_id: Optional[str]  # Key of the LoadedDocument in LegalAgentNodes.documents
     document_metadata: Optional[dict]
     analysis_results: Optional[dict]
-    routing_decision: Optional[str]
\ No newline at end of file
+    routing_decision: Optional[str]
+    cache_handle: Optional[str]  # Gemini cached-content name for the loaded document
\ No newline at end of file
@@ -0,0 +1,138 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+import threading
+import time
+
+
+@dataclass
+class NodeUsage:
+    """Accumulated LLM usage for one graph node."""
+    
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    latency_s: float = 0.0
+    ttft_s: float = 0.0
+    ttft_samples: int = 0
+    
+    @property
+    def avg_latency_s(self) -> float:
+        return self.latency_s / self.calls if self.calls else 0.0
+    
+    @property
+    def avg_ttft_s(self) -> float:
+        return self.ttft_s / self.ttft_samples if self.ttft_samples else 0.0
+
+
+@dataclass
+class _Run:
+    node: str
+    started: float
+    first_token: Optional[float] = None
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """
+    Records token usage, latency and time-to-first-token of every LLM call,
+    grouped by the LangGraph node that made it.
+    Thread-safe, so one handler can observe concurrent graph runs.
+    """
+    
+    def __init__(self):
+        self._runs: Dict[UUID, _Run] = {}
+        self._usage: Dict[str, NodeUsage] = {}
+        self._lock = threading.Lock()
+    
+    def _start(self, run_id: UUID, metadata: Optional[dict]) -> None:
+        # Calls made outside the graph can label themselves via metadata["usage_node"]
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node") or metadata.get("usage_node") or "llm"
+        with self._lock:
+            self._runs[run_id] = _Run(node=node, started=time.perf_counter())
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs) -> None:
+        self._start(run_id, metadata)
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs) -> None:
+        self._start(run_id, metadata)
+    
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run.first_token is None:
+                run.first_token = time.perf_counter()
+    
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        input_tokens, output_tokens, cached_tokens = self._token_counts(response)
+        finished = time.perf_counter()
+        
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            
+            usage = self._usage.setdefault(run.node, NodeUsage())
+            usage.calls += 1
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.cached_tokens += cached_tokens
+            usage.latency_s += finished - run.started
+            if run.first_token is not None:
+                usage.ttft_s += run.first_token - run.started
+                usage.ttft_samples += 1
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+    
+    @staticmethod
+    def _token_counts(response: LLMResult) -> tuple[int, int, int]:
+        """Extract (input, output, cached) tokens from message usage metadata or llm_output."""
+        input_tokens = output_tokens = cached_tokens = 0
+        
+        for generations in response.generations:
+            for generation in generations:
+                usage: Any = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+                    cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+        
+        if not (input_tokens or output_tokens):
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = token_usage.get("prompt_tokens", 0)
+            output_tokens = token_usage.get("completion_tokens", 0)
+        
+        return input_tokens, output_tokens, cached_tokens
+    
+    def snapshot(self) -> Dict[str, NodeUsage]:
+        """
+        Get a copy of the usage recorded so far.
+        
+        Returns:
+            Mapping of node name to its accumulated usage
+        """
+        with self._lock:
+            return {node: NodeUsage(**vars(usage)) for node, usage in self._usage.items()}
+    
+    def totals(self) -> NodeUsage:
+        """
+        Get usage summed over all nodes.
+        
+        Returns:
+            NodeUsage aggregate across every recorded call
+        """
+        total = NodeUsage()
+        for usage in self.snapshot().values():
+            for field, value in vars(usage).items():
+                setattr(total, field, getattr(total, field) + value)
+        return total
+    
+    def reset(self) -> None:
+        """Discard all recorded usage."""
+        with self._lock:
+            self._usage.clear()
@@ -1,12 +1,19 @@
-from legal_chatbot.agents.classifier import LegalAgentNodes
+from legal_chatbot.agents.classifier import LegalAgentNodes, get_agent_nodes
 from legal_chatbot.models.query_models import LegalChatState
 from langgraph.graph import StateGraph, START, END
+from functools import lru_cache
+from typing import Optional
 
 
-def build_legal_graph() -> StateGraph:
-    """Construct the legal chatbot workflow graph."""
+def build_legal_graph(nodes: Optional[LegalAgentNodes] = None) -> StateGraph:
+    """
+    Construct the legal chatbot workflow graph.
     
-    nodes = LegalAgentNodes()
+    Args:
+        nodes: Agent nodes to wire into the graph (created if not provided)
+    """
+    
+    nodes = nodes or LegalAgentNodes()
     graph_builder = StateGraph(LegalChatState)
     
     # Add nodes
@@ -46,3 +53,12 @@ def build_legal_graph() -> StateGraph:
     graph_builder.add_edge("general_assistant", END)
     
     return graph_builder.compile()
+
+
+@lru_cache(maxsize=1)
+def get_legal_graph() -> StateGraph:
+    """
+    Get the process-wide compiled graph, wired to the shared agent nodes.
+    The compiled graph holds no per-session state, so every chatbot can reuse it.
+    """
+    return build_legal_graph(get_agent_nodes())